@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import requests
+import dedup
+import reddit_config
+from dotenv import load_dotenv
+from lazy_client import LazyClient
+
+load_dotenv()
+
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')
+CLASSIFIER_URL = os.getenv('CLASSIFIER_URL', 'http://localhost:5001').rstrip('/')
+CLASSIFY_MS_PER_TEXT = float(os.getenv('CLASSIFY_MS_PER_TEXT', 2.0))
+
+def _create_openai_client():
+    from openai import OpenAI
+    return OpenAI(base_url=OPENAI_BASE_URL) if OPENAI_BASE_URL else OpenAI()
+
+
+_openai_client = LazyClient(_create_openai_client)
+
+def get_openai_client():
+    return _openai_client.get()
+
+class NoValidTextError(Exception):
+    """Raised when no text is left to classify once the classifier cleans it."""
+
+
+def _content_cache_key(kind, payload):
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"{kind}:{digest}"
+
+def fetch_posts(keyword, limit=100, time_filter='all', dedup_enabled=True):
+    posts_data = reddit_config.search_reddit_posts(keyword, limit, time_filter)
+
+    fetched_posts = []
+    for post in posts_data:
+        post_data = post["data"]
+        subreddit_name = post_data.get("subreddit", "Unknown")
+
+        permalink = post_data.get("permalink", "")
+        full_reddit_url = f"https://www.reddit.com{permalink}" if permalink else post_data.get("url", "https://reddit.com")
+
+        fetched_posts.append({
+            "id": post_data.get("id"),
+            "title": post_data.get("title", "Untitled"),
+            "text": post_data.get("selftext", ""),
+            "score": post_data.get("score", 0),
+            "num_comments": post_data.get("num_comments", 0), 
+            "url": full_reddit_url,
+            "author": post_data.get("author", "Unknown"),
+            "created_utc": post_data.get("created_utc", 0),
+            "is_video": post_data.get("is_video", False),
+            "upvote_ratio": post_data.get("upvote_ratio", 0),
+            "subreddit": subreddit_name
+        })
+
+    dedup_stats = None
+    if dedup_enabled:
+        fetched_posts, dedup_stats = dedup.collapse_duplicates(fetched_posts)
+        dedup_stats["estimated_time_saved_ms"] = round(
+            dedup_stats["duplicates_removed"] * CLASSIFY_MS_PER_TEXT - dedup_stats["dedup_ms"], 2
+        )
+
+    all_posts = {}
+    for post in fetched_posts:
+        all_posts.setdefault(post["subreddit"], []).append(post)
+    return all_posts, dedup_stats
+
+def classify_texts(texts, groups=None, weights=None, return_probabilities=False, timeout=30):
+    payload = {"texts": texts}
+    if groups is not None:
+        payload["groups"] = groups
+    if weights is not None:
+        payload["weights"] = weights
+    if return_probabilities:
+        payload["return_probabilities"] = True
+
+    response = requests.post(f"{CLASSIFIER_URL}/predict", json=payload, timeout=timeout)
+    if response.status_code == 400 and "No valid text" in response.text:
+        raise NoValidTextError(f"Classification failed: {response.text}")
+    if response.status_code != 200:
+        raise Exception(f"Classification failed: {response.text}")
+    return response.json()
+
+def classify_posts(posts, timeout=30, extend_ttl=False):
+    texts, groups, weights = [], [], []
+    for post in posts:
+        text = post.get("text") or post.get("title")
+        if text:
+            texts.append(text)
+            groups.append(post.get("subreddit", "Unknown"))
+            weights.append(post.get("weight", 1))
+    if not texts:
+        raise Exception("No valid text found in posts for analysis")
+
+    # Keyed by content, so results computed by the prewarmer are reused by
+    # jobs that end up classifying the same posts. `extend_ttl` restarts the
+    # expiry of a cached result, for the prewarmer refreshing unchanged posts.
+    cache_key = _content_cache_key("sentiment", [texts, groups, weights])
+    cached = reddit_config.cache_get(cache_key)
+    if cached:
+        if extend_ttl:
+            reddit_config.cache_set(cache_key, cached)
+        return cached
+    result = classify_texts(texts, groups=groups, weights=weights, timeout=timeout)
+    reddit_config.cache_set(cache_key, result)
+    return result
+
+def build_summary_prompt(keyword, sentiment_data, posts):
+    post_summaries = []
+    for i, p in enumerate(posts[:6]):
+        if isinstance(p, dict):
+            title = p.get('title', '')
+            text = p.get('text', '')
+            score = p.get('score', 0)
+            subreddit = p.get('subreddit', '')
+            
+            content = f"{title}. {text}".strip()
+            if len(content) > 150:
+                content = content[:150] + "..."
+            
+            if content and len(content.strip('. ')) > 10:
+                post_summaries.append(f"r/{subreddit}: {content} ({score} upvotes)")
+            elif title.strip():
+                post_summaries.append(f"r/{subreddit}: {title} ({score} upvotes)")
+    
+    if not post_summaries:
+        return None
+        
+    system_prompt = (
+        "You are an expert sentiment analyst specializing in Reddit community analysis. "
+        "Provide comprehensive, insightful analysis that explains WHY the sentiment exists by examining actual post content and context. "
+        "Use specific examples from posts to support your analysis. Create a well-structured, detailed summary with multiple sections. "
+        "For financial topics, discuss whether the community is bullish/bearish and explain the reasoning."
+    )
+
+    prompt = (
+        f"Analyze the sentiment for '{keyword}' based on Reddit community discussions.\n\n"
+        f"SENTIMENT DATA:\n"
+        f"Overall: {sentiment_data['sentiment']} ({sentiment_data.get('positive_percentage', 0)}% positive, {sentiment_data.get('negative_percentage', 0)}% negative)\n\n"
+        f"SAMPLE POSTS:\n" + "\n".join(post_summaries) + "\n\n"
+        f"Provide a comprehensive analysis with the following structure:\n\n"
+        f"### 📊 Sentiment Overview\n"
+        f"[Detailed explanation of why the sentiment is {sentiment_data['sentiment']} based on the post content and community discussions]\n\n"
+        f"### 🔍 Key Themes & Insights\n"
+        f"• **[Theme 1]:** [Detailed insight with specific examples from posts]\n"
+        f"• **[Theme 2]:** [Another insight with context and evidence]\n"
+        f"• **[Theme 3]:** [Third insight explaining sentiment drivers]\n"
+        f"• **[Theme 4]:** [Additional insight about implications or trends]\n\n"
+        f"### 💡 Community Perspective\n"
+        f"[Explain what this sentiment tells us about how the community views this topic, including any notable patterns, concerns, or excitement]\n\n"
+        f"### 🎯 What This Means\n"
+        f"[Practical interpretation of the sentiment - what should someone understand about the community's current stance on this topic]"
+        + (f"\n\n### ⚠️ Disclaimer\n[Standard investment disclaimer noting this is for informational purposes only]" if any(word in keyword.lower() for word in ['stock', 'crypto', 'invest', 'trade', '$', 'nvda', 'tesla', 'bitcoin', 'eth', 'amd', 'msft', 'aapl']) else "")
+    )
+    return system_prompt, prompt
+
+def generate_summary(system_prompt, prompt, extend_ttl=False):
+    cache_key = _content_cache_key("summary", [system_prompt, prompt])
+    cached = reddit_config.cache_get(cache_key)
+    if cached:
+        if extend_ttl:
+            reddit_config.cache_set(cache_key, cached)
+        return cached
+
+    ai = get_openai_client().chat.completions.create(
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=700,
+        temperature=0.4
+    )
+    summary = ai.choices[0].message.content.strip()
+    reddit_config.cache_set(cache_key, summary)
+    return summary
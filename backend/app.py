@@ -1,20 +1,59 @@
+import time
+_import_start = time.perf_counter()
+
 from flask import Flask, request, jsonify
-from firestore_config import db
 from routes import init_routes
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+import logging
 import os
+import firestore_config
+import redis_config
+import analysis
+
+IMPORT_TIME = time.perf_counter() - _import_start
+
+WARMABLE_CLIENTS = {
+    'firestore': firestore_config.get_db,
+    'auth': firestore_config.get_auth,
+    'redis': redis_config.get_redis_client,
+    'openai': analysis.get_openai_client,
+}
+
+def warm_clients(app, names):
+    for name in names:
+        factory = WARMABLE_CLIENTS.get(name)
+        if factory is None:
+            app.logger.warning(f"Unknown client to warm: {name}")
+            continue
+        start = time.perf_counter()
+        try:
+            factory()
+            app.logger.info(f"Warmed {name} client in {(time.perf_counter() - start) * 1000:.1f}ms")
+        except Exception as e:
+            app.logger.warning(f"Failed to warm {name} client: {str(e)}")
 
 def create_app():
     app = Flask(__name__)
-    
+    # Flask only attaches its stderr handler; without an explicit level the
+    # root WARNING level applies and startup reports are dropped under gunicorn.
+    log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
+    # getLevelName returns the numeric level for known names (getLevelNamesMapping
+    # would need Python 3.11, and the backend supports 3.9+).
+    if not isinstance(logging.getLevelName(log_level), int):
+        app.logger.warning(f"Unknown LOG_LEVEL '{log_level}', using INFO")
+        log_level = 'INFO'
+    app.logger.setLevel(log_level)
+    app.logger.info(f"Backend modules imported in {IMPORT_TIME * 1000:.1f}ms")
+    app.config['RATELIMIT_ENABLED'] = os.getenv('RATELIMIT_ENABLED', 'true').lower() != 'false'
+
     limiter = Limiter(
         key_func=get_remote_address,
         default_limits=["200 per day", "50 per hour"]
     )
     limiter.init_app(app)
-    
+
     @app.after_request
     def after_request(response):
         response.headers['X-Content-Type-Options'] = 'nosniff'
@@ -22,15 +61,21 @@ def create_app():
         response.headers['X-XSS-Protection'] = '1; mode=block'
         response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
         return response
-    
+
     if os.getenv('FLASK_ENV') == 'production':
         CORS(app, origins=['https://yourdomain.com'])
     else:
         CORS(app)
-    
+
     init_routes(app)
+
+    warm = os.getenv('WARM_CLIENTS', '')
+    if warm:
+        names = WARMABLE_CLIENTS.keys() if warm == 'all' else [n.strip() for n in warm.split(',') if n.strip()]
+        warm_clients(app, names)
     return app
 
 if __name__ == '__main__':
     app = create_app()
+    print(f"Backend modules imported in {IMPORT_TIME * 1000:.1f}ms")
     app.run(debug=False)
@@ -0,0 +1,170 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import analysis
+import reddit_config
+
+COMMENT_CACHE_TTL = int(os.getenv("COMMENT_CACHE_TTL", 1800))
+COMMENT_FETCH_CONCURRENCY = int(os.getenv("COMMENT_FETCH_CONCURRENCY", 4))
+COMMENT_CLASSIFY_BATCH_SIZE = int(os.getenv("COMMENT_CLASSIFY_BATCH_SIZE", 200))
+
+MAX_COMMENT_POSTS = 25
+MAX_COMMENTS_PER_POST = 100
+MAX_COMMENT_DEPTH = 5
+
+
+def _cache_key(post_id, limit, depth):
+    return f"reddit_comments:{post_id}:{limit}:{depth}"
+
+def top_posts(posts, count):
+    """Return the `count` highest scoring posts that have a Reddit id."""
+    with_ids = [post for post in posts if post.get("id")]
+    return sorted(with_ids, key=lambda post: post.get("score", 0), reverse=True)[:count]
+
+def iter_post_comments(post_ids, limit=20, depth=1, max_workers=COMMENT_FETCH_CONCURRENCY):
+    """
+    Yield (post_id, comments) pairs as they become available.
+
+    Cached posts are read with a single MGET and yielded first; the rest are
+    fetched from Reddit with at most `max_workers` requests in flight and
+    yielded in completion order. A post whose comments fail to load yields
+    an empty list rather than failing the whole batch.
+    """
+    if not post_ids:
+        return
+
+    # Cache calls share the search cache's fail-fast client and circuit
+    # breaker; any failure is treated as a miss.
+    keys = [_cache_key(post_id, limit, depth) for post_id in post_ids]
+    cached, _ = reddit_config.search_cache.call_redis(lambda client: client.mget(keys))
+    if cached is None:
+        cached = [None] * len(keys)
+
+    missing = []
+    for post_id, value in zip(post_ids, cached):
+        if value is not None:
+            yield post_id, json.loads(value)
+        else:
+            missing.append(post_id)
+
+    if not missing:
+        return
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing)))) as executor:
+        futures = {
+            executor.submit(reddit_config.fetch_post_comments, post_id, limit, depth): post_id
+            for post_id in missing
+        }
+        for future in as_completed(futures):
+            post_id = futures[future]
+            try:
+                comments = future.result()
+            except Exception:
+                yield post_id, []
+                continue
+            key, value = _cache_key(post_id, limit, depth), json.dumps(comments)
+            reddit_config.search_cache.call_redis(lambda client: client.setex(key, COMMENT_CACHE_TTL, value))
+            yield post_id, comments
+
+def _sentiment_summary(positive_mean):
+    positive_percentage = float(positive_mean) * 100
+    negative_percentage = 100 - positive_percentage
+    return {
+        "sentiment": "Positive" if positive_percentage > negative_percentage else "Negative",
+        "positive_percentage": round(positive_percentage, 2),
+        "negative_percentage": round(negative_percentage, 2)
+    }
+
+def classify_comment_stream(comment_stream, batch_size=COMMENT_CLASSIFY_BATCH_SIZE):
+    """
+    Classify comments in fixed-size batches as they arrive from `comment_stream`.
+
+    Batches are sent while later posts are still being fetched, so the
+    classifier works in parallel with the Reddit requests.
+
+    Returns:
+        dict: Overall comment sentiment plus per-post counts and percentages
+    """
+    pending_texts, pending_posts = [], []
+    probabilities, owners = [], []
+
+    def flush():
+        if not pending_texts:
+            return
+        texts, post_ids = pending_texts[:], pending_posts[:]
+        pending_texts.clear()
+        pending_posts.clear()
+        try:
+            prediction = analysis.classify_texts(texts, return_probabilities=True)
+        except analysis.NoValidTextError:
+            # Every comment in the batch cleaned to nothing (e.g. bare links).
+            return
+        for post_id, probability in zip(post_ids, prediction.get("probabilities", [])):
+            if probability is not None:
+                probabilities.append(probability)
+                owners.append(post_id)
+
+    for post_id, post_comments in comment_stream:
+        for comment in post_comments:
+            pending_texts.append(comment["body"])
+            pending_posts.append(post_id)
+            if len(pending_texts) >= batch_size:
+                flush()
+    flush()
+
+    if not probabilities:
+        return {"comment_count": 0, "posts": {}}
+
+    positive = np.asarray(probabilities, dtype=float)
+    post_ids, inverse = np.unique(np.asarray(owners), return_inverse=True)
+    counts = np.bincount(inverse)
+    positive_means = np.bincount(inverse, weights=positive) / counts
+
+    overall = _sentiment_summary(positive.mean())
+    overall["comment_count"] = int(positive.size)
+    overall["posts"] = {
+        str(post_id): dict(_sentiment_summary(mean), count=int(count))
+        for post_id, count, mean in zip(post_ids, counts, positive_means)
+    }
+    return overall
+
+def parse_comment_options(source):
+    """
+    Read comment ingestion options from query args or a JSON body.
+
+    Returns:
+        tuple: (options dict, or None when comments are not requested; error message or None)
+    """
+    enabled = source.get("comments", False)
+    if isinstance(enabled, str):
+        enabled = enabled.lower() == "true"
+    if not enabled:
+        return None, None
+
+    bounds = {
+        "posts": ("comment_posts", 10, MAX_COMMENT_POSTS),
+        "limit": ("comment_limit", 20, MAX_COMMENTS_PER_POST),
+        "depth": ("comment_depth", 1, MAX_COMMENT_DEPTH),
+    }
+    options = {}
+    for name, (field, default, maximum) in bounds.items():
+        try:
+            value = int(source.get(field, default))
+        except (TypeError, ValueError):
+            return None, f"{field} must be a valid number"
+        if value < 1 or value > maximum:
+            return None, f"{field} must be between 1 and {maximum}"
+        options[name] = value
+    return options, None
+
+def attach_comments(posts, post_count, limit, depth):
+    """Attach fetched comment lists to the top `post_count` posts in place."""
+    by_id = {post["id"]: post for post in top_posts(posts, post_count)}
+    for post_id, post_comments in iter_post_comments(list(by_id), limit, depth):
+        by_id[post_id]["comments"] = post_comments
+    return len(by_id)
+
+def comment_sentiment(posts, post_count, limit, depth):
+    post_ids = [post["id"] for post in top_posts(posts, post_count)]
+    return classify_comment_stream(iter_post_comments(post_ids, limit, depth))
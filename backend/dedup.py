@@ -0,0 +1,148 @@
+import hashlib
+import re
+import time
+
+SIMHASH_BITS = 64
+SIMHASH_MAX_DISTANCE = 7
+SIMHASH_MIN_TOKENS = 6
+SHINGLE_SIZE = 2
+
+_BLOCKS = SIMHASH_MAX_DISTANCE + 1
+_BLOCK_BITS = SIMHASH_BITS // _BLOCKS
+_BLOCK_MASK = (1 << _BLOCK_BITS) - 1
+
+_url_pattern = re.compile(r'https?://\S+')
+_token_pattern = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    text = _url_pattern.sub(' ', (text or '').lower())
+    return _token_pattern.findall(text)
+
+def exact_hash(tokens):
+    return hashlib.sha1(' '.join(tokens).encode('utf-8')).hexdigest()
+
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def simhash(tokens):
+    # Single words plus shingles: shingles alone make short texts unstable,
+    # since one edit changes a large share of the features.
+    features = tokens + [' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+
+    if not features:
+        return 0
+
+    # Column-wise bit counts over the binary strings run in C rather than
+    # a Python loop per bit per feature.
+    threshold = len(features) / 2
+    columns = zip(*(format(_feature_hash(feature), '064b') for feature in features))
+    fingerprint = 0
+    for column in columns:
+        fingerprint = (fingerprint << 1) | (column.count('1') > threshold)
+    return fingerprint
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+class DuplicateIndex:
+    """
+    Groups texts into exact and near-duplicate clusters.
+
+    Exact copies are matched on a hash of the normalized tokens. Near copies
+    are matched by SimHash fingerprints within SIMHASH_MAX_DISTANCE bits, using
+    the pigeonhole trick: two fingerprints that close must share at least one
+    of the fingerprint's SIMHASH_MAX_DISTANCE + 1 blocks exactly, so only
+    fingerprints sharing a block are compared.
+    """
+
+    def __init__(self):
+        self._exact = {}
+        self._blocks = [{} for _ in range(_BLOCKS)]
+        self._fingerprints = []
+
+    def _block_keys(self, fingerprint):
+        return [(fingerprint >> (i * _BLOCK_BITS)) & _BLOCK_MASK for i in range(_BLOCKS)]
+
+    def find_or_add(self, text, cluster_id):
+        """Return the id of the cluster `text` duplicates, registering it under `cluster_id` if none."""
+        tokens = tokenize(text)
+        if not tokens:
+            # Nothing left to compare once URLs are stripped (link, image and
+            # emoji-only posts), so the post is never treated as a copy.
+            return cluster_id
+
+        key = exact_hash(tokens)
+        if key in self._exact:
+            return self._exact[key]
+
+        fingerprint = None
+        if len(tokens) >= SIMHASH_MIN_TOKENS:
+            fingerprint = simhash(tokens)
+            block_keys = self._block_keys(fingerprint)
+            for block, block_key in zip(self._blocks, block_keys):
+                for candidate in block.get(block_key, ()):
+                    candidate_fingerprint, candidate_id = self._fingerprints[candidate]
+                    if hamming_distance(fingerprint, candidate_fingerprint) <= SIMHASH_MAX_DISTANCE:
+                        self._exact[key] = candidate_id
+                        return candidate_id
+
+        self._exact[key] = cluster_id
+        if fingerprint is not None:
+            position = len(self._fingerprints)
+            self._fingerprints.append((fingerprint, cluster_id))
+            for block, block_key in zip(self._blocks, block_keys):
+                block.setdefault(block_key, []).append(position)
+        return cluster_id
+
+
+def post_text(post):
+    # Title and body together: many unrelated posts share a short body or a
+    # bare link, and crossposts repeat both.
+    return f"{post.get('title') or ''} {post.get('text') or ''}"
+
+def collapse_duplicates(posts):
+    """
+    Collapse crossposts and copy-pasted posts, keeping the first occurrence.
+
+    Each kept post gains `duplicate_count` (copies including itself),
+    `weight` (equal to the count, for weighted aggregation),
+    `duplicate_subreddits` (other communities the copies appeared in) and
+    `duplicate_ids` (ids of the collapsed copies, when posts have ids).
+
+    Returns:
+        tuple: (unique posts in original order, stats dict)
+    """
+    start = time.perf_counter()
+    index = DuplicateIndex()
+    unique = []
+
+    for post in posts:
+        cluster_id = index.find_or_add(post_text(post), len(unique))
+        if cluster_id == len(unique):
+            post["duplicate_count"] = 1
+            post["weight"] = 1
+            post["duplicate_subreddits"] = []
+            post["duplicate_ids"] = []
+            unique.append(post)
+        else:
+            kept = unique[cluster_id]
+            kept["duplicate_count"] += 1
+            kept["weight"] += 1
+            if post.get("id"):
+                kept["duplicate_ids"].append(post["id"])
+            subreddit = post.get("subreddit")
+            if subreddit and subreddit != kept.get("subreddit") and subreddit not in kept["duplicate_subreddits"]:
+                kept["duplicate_subreddits"].append(subreddit)
+
+    total = len(posts)
+    removed = total - len(unique)
+    stats = {
+        "total_posts": total,
+        "unique_posts": len(unique),
+        "duplicates_removed": removed,
+        "dedup_ratio": round(removed / total, 4) if total else 0.0,
+        "dedup_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+    return unique, stats
@@ -1,20 +1,41 @@
 import os
 from dotenv import load_dotenv
-import firebase_admin
-
-from firebase_admin import credentials, firestore, auth
-import firebase_admin.auth
+from lazy_client import LazyClient
 
 load_dotenv()
 
 firebase_private_key_path = os.getenv('FIREBASE_PRIVATE_KEY_PATH')
 
 
-cred = credentials.Certificate(firebase_private_key_path)
-app = firebase_admin.initialize_app(cred)
+def _create_app():
+    import firebase_admin
+    from firebase_admin import credentials
+
+    cred = credentials.Certificate(firebase_private_key_path)
+    return firebase_admin.initialize_app(cred)
+
+def _create_db():
+    from firebase_admin import firestore
+    return firestore.client(app=get_app())
+
+def _create_auth():
+    from firebase_admin import auth
+    return auth.Client(app=get_app())
+
+
+_app = LazyClient(_create_app)
+_db = LazyClient(_create_db)
+_auth = LazyClient(_create_auth)
 
+def get_app():
+    return _app.get()
 
-db = firestore.client(app=app)
+def get_db():
+    return _db.get()
 
-auth = auth.Client(app=app)
+def get_auth():
+    return _auth.get()
 
+def server_timestamp():
+    from firebase_admin import firestore
+    return firestore.SERVER_TIMESTAMP
@@ -0,0 +1,236 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+from redis_config import get_redis_client
+
+JOB_QUEUE_KEY = "job_queue"
+JOB_PROCESSING_KEY = "job_processing"
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", 3600))
+# A claimed job that has not reported progress for this long is assumed to
+# belong to a dead worker. Each stage reports progress, and no stage comes
+# close to this.
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", 300))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+TERMINAL_STATUSES = (STATUS_COMPLETED, STATUS_FAILED)
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+
+def job_key(job_id):
+    return f"job:{job_id}"
+
+def job_channel(job_id):
+    return f"job_events:{job_id}"
+
+def params_fingerprint(params):
+    normalized = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def _inflight_key(fingerprint):
+    return f"job_inflight:{fingerprint}"
+
+def _decode(job):
+    if not job:
+        return None
+    decoded = dict(job)
+    for field in ("params", "result"):
+        if decoded.get(field):
+            decoded[field] = json.loads(decoded[field])
+    for field in ("progress", "attempts"):
+        if field in decoded:
+            decoded[field] = int(decoded[field])
+    return decoded
+
+def get_job(job_id):
+    return _decode(get_redis_client().hgetall(job_key(job_id)))
+
+def submit_job(params):
+    """
+    Queue an analysis job, reusing an identical job that is still queued or
+    running. Finished jobs are not reused, so results never outlive the
+    search cache they were computed from.
+
+    Returns:
+        tuple: (job_id, deduplicated)
+    """
+    redis_client = get_redis_client()
+    inflight_key = _inflight_key(params_fingerprint(params))
+
+    existing_id = redis_client.get(inflight_key)
+    if existing_id:
+        status = redis_client.hget(job_key(existing_id), "status")
+        if status in ACTIVE_STATUSES:
+            return existing_id, True
+
+    job_id = uuid.uuid4().hex
+    if not redis_client.set(inflight_key, job_id, nx=True, ex=JOB_RESULT_TTL):
+        # Another request registered the same job between our GET and SET.
+        existing_id = redis_client.get(inflight_key)
+        status = redis_client.hget(job_key(existing_id), "status") if existing_id else None
+        if status in ACTIVE_STATUSES:
+            return existing_id, True
+        redis_client.set(inflight_key, job_id, ex=JOB_RESULT_TTL)
+
+    now = time.time()
+    pipe = redis_client.pipeline()
+    pipe.hset(job_key(job_id), mapping={
+        "id": job_id,
+        "status": STATUS_QUEUED,
+        "stage": "queued",
+        "progress": 0,
+        "attempts": 1,
+        "params": json.dumps(params),
+        "fingerprint": inflight_key,
+        "created_at": now,
+        "updated_at": now,
+    })
+    pipe.expire(job_key(job_id), JOB_RESULT_TTL)
+    pipe.lpush(JOB_QUEUE_KEY, job_id)
+    pipe.execute()
+    return job_id, False
+
+def update_job(job_id, **fields):
+    """Update job fields, refresh its TTL and publish the new state to subscribers."""
+    redis_client = get_redis_client()
+    fields["updated_at"] = time.time()
+    stored = {k: json.dumps(v) if k in ("params", "result") else v for k, v in fields.items()}
+
+    pipe = redis_client.pipeline()
+    pipe.hset(job_key(job_id), mapping=stored)
+    pipe.expire(job_key(job_id), JOB_RESULT_TTL)
+    pipe.execute()
+
+    event = {k: v for k, v in fields.items() if k != "result"}
+    event["id"] = job_id
+    redis_client.publish(job_channel(job_id), json.dumps(event))
+
+    if fields.get("status") in TERMINAL_STATUSES:
+        inflight_key = redis_client.hget(job_key(job_id), "fingerprint")
+        if inflight_key and redis_client.get(inflight_key) == job_id:
+            redis_client.delete(inflight_key)
+
+def _stamp_claim(redis_client, job_id):
+    """
+    Mark a job moved onto the processing list as running and record when it
+    was claimed, in one transaction. WATCH keeps an expired job from being
+    recreated as a partial hash; its id is dropped from the list instead.
+    """
+    def stamp(pipe):
+        exists = pipe.exists(job_key(job_id))
+        pipe.multi()
+        if not exists:
+            pipe.lrem(JOB_PROCESSING_KEY, 1, job_id)
+            return False
+        now = time.time()
+        pipe.hset(job_key(job_id), mapping={"status": STATUS_RUNNING, "claimed_at": now, "updated_at": now})
+        pipe.expire(job_key(job_id), JOB_RESULT_TTL)
+        return True
+
+    return redis_client.transaction(stamp, job_key(job_id), value_from_callable=True)
+
+def next_job(timeout=5):
+    """
+    Claim the oldest queued job. The id is moved atomically onto the
+    processing list, so it is not lost if the worker dies before acking it,
+    and the claim time is stamped before the job is returned.
+    """
+    redis_client = get_redis_client()
+    job_id = redis_client.blmove(JOB_QUEUE_KEY, JOB_PROCESSING_KEY, timeout, src="RIGHT", dest="LEFT")
+    if job_id is None or not _stamp_claim(redis_client, job_id):
+        return None
+    return job_id
+
+def ack_job(job_id):
+    get_redis_client().lrem(JOB_PROCESSING_KEY, 1, job_id)
+
+def requeue_stale_jobs(stale_after=JOB_STALE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS):
+    """
+    Recover jobs claimed by workers that stopped reporting progress.
+
+    Staleness is measured from the later of the claim time and the last
+    progress update, never from the time the job waited in the queue. A job
+    whose claim was not stamped yet (its worker may have died right after
+    BLMOVE) starts its clock when the reaper first sees it.
+
+    A stale job is put back at the head of the queue, or marked failed once
+    it has been attempted `max_attempts` times. Removing the id from the
+    processing list is the claim, so concurrent reapers never requeue the
+    same job twice.
+
+    Returns:
+        int: Number of jobs requeued or failed
+    """
+    redis_client = get_redis_client()
+    now = time.time()
+    recovered = 0
+    for job_id in redis_client.lrange(JOB_PROCESSING_KEY, 0, -1):
+        claimed_at, updated_at, attempts = redis_client.hmget(job_key(job_id), ["claimed_at", "updated_at", "attempts"])
+        if updated_at is None:
+            # The job hash expired, there is nothing left to run.
+            redis_client.lrem(JOB_PROCESSING_KEY, 1, job_id)
+            continue
+        if claimed_at is None:
+            pipe = redis_client.pipeline()
+            pipe.hsetnx(job_key(job_id), "claimed_at", now)
+            pipe.expire(job_key(job_id), JOB_RESULT_TTL)
+            pipe.execute()
+            continue
+        if now - max(float(claimed_at), float(updated_at)) < stale_after:
+            continue
+        if not redis_client.lrem(JOB_PROCESSING_KEY, 1, job_id):
+            continue
+        recovered += 1
+        attempts = int(attempts or 1)
+        if attempts >= max_attempts:
+            update_job(job_id, status=STATUS_FAILED, error=f"Worker stopped responding after {attempts} attempts")
+            continue
+        redis_client.hdel(job_key(job_id), "claimed_at")
+        update_job(job_id, status=STATUS_QUEUED, stage="queued", progress=0, attempts=attempts + 1)
+        redis_client.rpush(JOB_QUEUE_KEY, job_id)
+    return recovered
+
+def iter_job_events(job_id, heartbeat=15):
+    """
+    Yield job states as they change until the job finishes.
+
+    Yields the current state first, then one state per published update;
+    None is yielded every `heartbeat` seconds without updates so callers
+    can keep the connection alive.
+    """
+    redis_client = get_redis_client()
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(job_channel(job_id))
+    try:
+        job = get_job(job_id)
+        yield job
+        if job is None or job["status"] in TERMINAL_STATUSES:
+            return
+        last_event = time.monotonic()
+        while True:
+            message = pubsub.get_message(timeout=heartbeat)
+            if message is None:
+                # get_message also returns None after swallowing the
+                # subscribe confirmation, so only treat real silence as idle.
+                if time.monotonic() - last_event < heartbeat:
+                    continue
+                last_event = time.monotonic()
+                job = get_job(job_id)
+                if job is None or job["status"] in TERMINAL_STATUSES:
+                    yield job
+                    return
+                yield None
+                continue
+            last_event = time.monotonic()
+            event = json.loads(message["data"])
+            if event.get("status") in TERMINAL_STATUSES:
+                yield get_job(job_id)
+                return
+            yield event
+    finally:
+        pubsub.close()
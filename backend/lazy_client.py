@@ -0,0 +1,26 @@
+import threading
+
+
+class LazyClient:
+    """Thread-safe singleton that builds its client on first use."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+                client = self._client
+        return client
+
+    def is_initialized(self):
+        return self._client is not None
+
+    def reset(self):
+        with self._lock:
+            self._client = None
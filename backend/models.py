@@ -1,4 +1,4 @@
-from firestore_config import db
+from firestore_config import get_db
 
 class User:
     def __init__(self, name, email, plan):
@@ -8,7 +8,7 @@ class User:
 
 
     def add_user(self):
-        user_ref, doc_id = db.collection("users").add({
+        user_ref, doc_id = get_db().collection("users").add({
             "name": self.name,
             "email": self.email,
             "plan": self.plan
@@ -0,0 +1,112 @@
+import os
+import time
+import reddit_config
+from redis_config import get_cache_redis_client
+
+POPULARITY_KEY = "keyword_popularity"
+POPULARITY_DECAYED_AT_KEY = "keyword_popularity:decayed_at"
+PREWARM_UNUSED_KEY = "prewarm_unused"
+PREWARM_IDLE_KEY = "prewarm_idle"
+PREWARM_STATS_KEY = "prewarm_stats"
+
+POPULARITY_HALF_LIFE = float(os.getenv("POPULARITY_HALF_LIFE", 3600))
+POPULARITY_MIN_SCORE = float(os.getenv("POPULARITY_MIN_SCORE", 0.05))
+
+STAT_FIELDS = ("refreshes", "hits", "wasted", "skipped_budget", "skipped_unread", "failures")
+
+
+def _member(keyword, time_filter, limit):
+    # The filter and limit never contain ':', so the keyword can be recovered
+    # even when it does.
+    return f"{time_filter}:{limit}:{reddit_config.normalize_keyword(keyword)}"
+
+def parse_member(member):
+    time_filter, limit, keyword = member.split(":", 2)
+    return keyword, time_filter, int(limit)
+
+def record_request(keyword, time_filter, limit):
+    """
+    Count a search for popularity ranking and check whether it was served by
+    a prewarmed cache entry.
+
+    Tracking must never fail or slow down the request it is attached to, so
+    it goes through the search cache's circuit breaker and is skipped while
+    Redis is unreachable.
+    """
+    cache_key = reddit_config.search_cache_key(keyword, time_filter)
+
+    def track(client):
+        pipe = client.pipeline()
+        pipe.zincrby(POPULARITY_KEY, 1, _member(keyword, time_filter, limit))
+        pipe.zscore(PREWARM_UNUSED_KEY, cache_key)
+        pipe.zrem(PREWARM_UNUSED_KEY, cache_key)
+        pipe.srem(PREWARM_IDLE_KEY, cache_key)
+        _, expires_at, removed, _ = pipe.execute()
+        if removed:
+            # An entry already past its expiry was never used while it was live.
+            outcome = "hits" if expires_at > time.time() else "wasted"
+            client.hincrby(PREWARM_STATS_KEY, outcome, 1)
+
+    reddit_config.search_cache.call_redis(track)
+
+def decay_scores(redis_client, now=None):
+    """
+    Halve every popularity score once per POPULARITY_HALF_LIFE and drop
+    keywords that have faded below POPULARITY_MIN_SCORE.
+
+    GETSET hands each caller only the time elapsed since the previous decay,
+    so running several prewarmers never decays twice.
+    """
+    now = time.time() if now is None else now
+    previous = redis_client.getset(POPULARITY_DECAYED_AT_KEY, now)
+    if previous is None:
+        return
+    elapsed = max(0.0, now - float(previous))
+    if elapsed:
+        redis_client.zunionstore(POPULARITY_KEY, {POPULARITY_KEY: 0.5 ** (elapsed / POPULARITY_HALF_LIFE)})
+    redis_client.zremrangebyscore(POPULARITY_KEY, "-inf", f"({POPULARITY_MIN_SCORE}")
+
+def top_requests(redis_client, count, min_score="-inf"):
+    """Return the `count` most popular (keyword, filter, limit, score) tuples scoring at least `min_score`."""
+    members = redis_client.zrevrangebyscore(POPULARITY_KEY, "+inf", min_score, start=0, num=count, withscores=True)
+    return [parse_member(member) + (score,) for member, score in members]
+
+def mark_prewarmed(redis_client, cache_key, expires_at):
+    """Remember that `cache_key` was refreshed ahead of demand and is waiting for a request."""
+    pipe = redis_client.pipeline()
+    pipe.zadd(PREWARM_UNUSED_KEY, {cache_key: expires_at})
+    pipe.hincrby(PREWARM_STATS_KEY, "refreshes", 1)
+    pipe.execute()
+
+def sweep_expired(redis_client, now=None):
+    """
+    Count prewarmed entries that expired without a single request as wasted,
+    and mark them idle so they are not prewarmed again until requested.
+    """
+    now = time.time() if now is None else now
+    pipe = redis_client.pipeline()
+    pipe.zrangebyscore(PREWARM_UNUSED_KEY, "-inf", now)
+    pipe.zremrangebyscore(PREWARM_UNUSED_KEY, "-inf", now)
+    expired, _ = pipe.execute()
+    if expired:
+        pipe = redis_client.pipeline()
+        pipe.sadd(PREWARM_IDLE_KEY, *expired)
+        pipe.hincrby(PREWARM_STATS_KEY, "wasted", len(expired))
+        pipe.execute()
+    return len(expired)
+
+def count(redis_client, field, amount=1):
+    redis_client.hincrby(PREWARM_STATS_KEY, field, amount)
+
+def stats(top=10):
+    redis_client = get_cache_redis_client()
+    raw = redis_client.hgetall(PREWARM_STATS_KEY)
+    result = {field: int(raw.get(field, 0)) for field in STAT_FIELDS}
+    resolved = result["hits"] + result["wasted"]
+    result["hit_ratio"] = round(result["hits"] / resolved, 4) if resolved else None
+    result["pending"] = redis_client.zcard(PREWARM_UNUSED_KEY)
+    result["top_keywords"] = [
+        {"keyword": keyword, "filter": time_filter, "limit": limit, "score": round(score, 3)}
+        for keyword, time_filter, limit, score in top_requests(redis_client, top)
+    ]
+    return result
@@ -0,0 +1,149 @@
+import argparse
+import logging
+import os
+import threading
+import time
+import analysis
+import popularity
+import reddit_config
+from redis_config import get_redis_client
+
+logger = logging.getLogger("sentiscope.prewarmer")
+
+REDDIT_REQUESTS_PER_MINUTE = float(os.getenv("REDDIT_REQUESTS_PER_MINUTE", 100))
+PREWARM_BUDGET_SHARE = float(os.getenv("PREWARM_BUDGET_SHARE", 0.2))
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", 20))
+# Decayed request count a keyword needs before it is worth refreshing; with
+# the default half-life this is roughly three requests in the last hour.
+PREWARM_MIN_SCORE = float(os.getenv("PREWARM_MIN_SCORE", 3))
+PREWARM_LEAD_SECONDS = int(os.getenv("PREWARM_LEAD_SECONDS", 60))
+PREWARM_INTERVAL = float(os.getenv("PREWARM_INTERVAL", 15))
+PREWARM_SUMMARIES = os.getenv("PREWARM_SUMMARIES", "true").lower() != "false"
+
+
+class RequestBudget:
+    """
+    Token bucket that allows at most `per_minute` Reddit requests per minute,
+    with bursts of up to one minute's worth.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_spend(self, cost):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.capacity / 60.0)
+            self._updated = now
+            if cost > self.tokens:
+                return False
+            self.tokens -= cost
+            return True
+
+
+def _group_by_search(requests):
+    """
+    Group popular (keyword, filter, limit) requests by the search cache entry
+    they share, keeping popularity order. Each entry is refreshed once with
+    the largest limit so every grouped request can be served from it.
+    """
+    groups = {}
+    for keyword, time_filter, limit, _ in requests:
+        groups.setdefault((keyword, time_filter), []).append(limit)
+    return groups
+
+def prewarm_analysis(keyword, time_filter, limit):
+    all_posts, _ = analysis.fetch_posts(keyword, limit, time_filter)
+    posts = [post for subreddit_posts in all_posts.values() for post in subreddit_posts]
+    if not posts:
+        return
+    # Unchanged posts hit the content-keyed caches; extending them keeps the
+    # sentiment and summary alive as long as the refreshed search results.
+    sentiment = analysis.classify_posts(posts, extend_ttl=True)
+    if PREWARM_SUMMARIES:
+        prompts = analysis.build_summary_prompt(keyword, sentiment, posts)
+        if prompts:
+            analysis.generate_summary(*prompts, extend_ttl=True)
+
+def run_cycle(budget, top_n=PREWARM_TOP_N, lead_seconds=PREWARM_LEAD_SECONDS, min_score=PREWARM_MIN_SCORE):
+    """
+    Refresh the search results, sentiment and summaries of the most popular
+    keywords whose cached results expire within `lead_seconds`.
+
+    An entry is only refreshed again once a request has read the previous
+    refresh; entries whose refresh expired unread stay idle until requested.
+
+    Returns:
+        dict: Number of entries refreshed, skipped for budget or as unread, and failed
+    """
+    redis_client = get_redis_client()
+    popularity.decay_scores(redis_client)
+    popularity.sweep_expired(redis_client)
+
+    groups = _group_by_search(popularity.top_requests(redis_client, top_n, min_score))
+    cache_keys = [reddit_config.search_cache_key(keyword, time_filter) for keyword, time_filter in groups]
+    pipe = redis_client.pipeline()
+    for cache_key in cache_keys:
+        pipe.ttl(cache_key)
+        pipe.zscore(popularity.PREWARM_UNUSED_KEY, cache_key)
+        pipe.sismember(popularity.PREWARM_IDLE_KEY, cache_key)
+    states = pipe.execute()
+
+    summary = {"refreshed": 0, "skipped_budget": 0, "skipped_unread": 0, "failures": 0}
+    for index, ((keyword, time_filter), limits) in enumerate(groups.items()):
+        cache_key = cache_keys[index]
+        ttl, unread, idle = states[index * 3:index * 3 + 3]
+        # TTL is -2 for a missing key, so popular keywords that went cold are
+        # warmed as well.
+        if ttl > lead_seconds:
+            continue
+        if unread is not None or idle:
+            summary["skipped_unread"] += 1
+            continue
+        if not budget.try_spend(reddit_config.search_page_count(max(limits))):
+            summary["skipped_budget"] += 1
+            continue
+        try:
+            reddit_config.refresh_search_posts(keyword, max(limits), time_filter)
+            popularity.mark_prewarmed(redis_client, cache_key, time.time() + reddit_config.CACHE_TTL)
+            for limit in limits:
+                prewarm_analysis(keyword, time_filter, limit)
+            summary["refreshed"] += 1
+        except Exception as e:
+            logger.warning(f"Failed to prewarm '{keyword}' ({time_filter}): {str(e)}")
+            summary["failures"] += 1
+
+    for field in ("skipped_budget", "skipped_unread", "failures"):
+        if summary[field]:
+            popularity.count(redis_client, field, summary[field])
+    return summary
+
+def prewarm_forever(interval=PREWARM_INTERVAL, budget_share=PREWARM_BUDGET_SHARE):
+    budget = RequestBudget(REDDIT_REQUESTS_PER_MINUTE * budget_share)
+    logger.info(f"Prewarmer started with a budget of {budget.capacity:g} Reddit requests per minute")
+    while True:
+        started = time.monotonic()
+        try:
+            summary = run_cycle(budget)
+            if any(summary.values()):
+                logger.info(f"Prewarm cycle: {summary}")
+        except Exception as e:
+            logger.warning(f"Prewarm cycle failed: {str(e)}")
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh cached results for popular keywords before they expire")
+    parser.add_argument("--interval", type=float, default=PREWARM_INTERVAL, help="Seconds between prewarm cycles")
+    parser.add_argument("--budget-share", type=float, default=PREWARM_BUDGET_SHARE,
+                        help="Share of the Reddit request budget the prewarmer may use")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    prewarm_forever(args.interval, args.budget_share)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,8 @@ from dotenv import load_dotenv
 import requests
 import time
 import json
-from redis_config import redis_client
+from redis_config import get_cache_redis_client
+from tiered_cache import L1Cache, CircuitBreaker, TieredCache
 
 load_dotenv()
 
@@ -11,14 +12,29 @@ reddit_client_id = os.getenv('REDDIT_CLIENT_ID')
 reddit_secret_key = os.getenv('REDDIT_SECRET_KEY')
 reddit_user_agent = os.getenv('USER_AGENT')
 
+REDDIT_AUTH_BASE_URL = os.getenv('REDDIT_AUTH_BASE_URL', 'https://www.reddit.com').rstrip('/')
+REDDIT_API_BASE_URL = os.getenv('REDDIT_API_BASE_URL', 'https://oauth.reddit.com').rstrip('/')
+
 CACHE_TTL = 600
+SEARCH_PAGE_SIZE = 100
+L1_CACHE_TTL = int(os.getenv('L1_CACHE_TTL', 60))
+L1_CACHE_MAX_BYTES = int(os.getenv('L1_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+search_cache = TieredCache(
+    L1Cache(max_bytes=L1_CACHE_MAX_BYTES, default_ttl=L1_CACHE_TTL),
+    CircuitBreaker(
+        failure_threshold=int(os.getenv('REDIS_BREAKER_FAILURES', 3)),
+        reset_timeout=float(os.getenv('REDIS_BREAKER_RESET', 30))
+    ),
+    get_cache_redis_client
+)
 
 access_token = None
 token_expiry = None
 
 def get_access_token():
     global access_token, token_expiry
-    url = "https://www.reddit.com/api/v1/access_token"
+    url = f"{REDDIT_AUTH_BASE_URL}/api/v1/access_token"
     headers = {"User-Agent": reddit_user_agent}
 
     data = {
@@ -46,18 +62,21 @@ def token_validity_check():
         return get_access_token()
     return access_token
 
+def normalize_keyword(keyword):
+    return " ".join(keyword.lower().split())
+
 def cache_get(key):
-    cached_data = redis_client.get(key)
+    cached_data = search_cache.get(key)
     if cached_data:
         return json.loads(cached_data)
     return None
 
-def cache_set(key, data):
-    redis_client.setex(key, CACHE_TTL, json.dumps(data))
+def cache_set(key, data, ttl=CACHE_TTL):
+    search_cache.set(key, json.dumps(data), ttl)
 
 def fetch_subreddit_posts(subreddit_name, limit=50):
     token = token_validity_check()
-    url = f"https://oauth.reddit.com/r/{subreddit_name}/hot?limit={limit}"
+    url = f"{REDDIT_API_BASE_URL}/r/{subreddit_name}/hot?limit={limit}"
     headers = {
         "Authorization": f"Bearer {token}",
         "User-Agent": reddit_user_agent
@@ -76,9 +95,46 @@ def fetch_subreddit_posts(subreddit_name, limit=50):
             error_detail += f", Response text: {response.text}"
         raise Exception(f"Failed to fetch posts: {response.text}")
     
+def flatten_comments(children, max_depth, depth=1):
+    comments = []
+    for child in children:
+        if child.get("kind") != "t1":
+            continue
+        comment_data = child["data"]
+        body = comment_data.get("body", "")
+        if body and body not in ("[deleted]", "[removed]"):
+            comments.append({
+                "id": comment_data.get("id"),
+                "body": body,
+                "score": comment_data.get("score", 0),
+                "depth": depth,
+                "created_utc": comment_data.get("created_utc", 0)
+            })
+        replies = comment_data.get("replies")
+        if depth < max_depth and isinstance(replies, dict):
+            comments.extend(flatten_comments(replies["data"]["children"], max_depth, depth + 1))
+    return comments
+
+def fetch_post_comments(post_id, limit=20, depth=1):
+    token = token_validity_check()
+    url = f"{REDDIT_API_BASE_URL}/comments/{post_id}?limit={limit}&depth={depth}&sort=top"
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "User-Agent": reddit_user_agent
+    }
+
+    response = requests.get(url, headers=headers)
+    if response.status_code == 200:
+        listings = response.json()
+        if len(listings) < 2:
+            return []
+        return flatten_comments(listings[1]["data"]["children"], depth)[:limit]
+    else:
+        raise Exception(f"Failed to fetch comments: {response.text}")
+
 def search_subreddits(keyword):
     token = token_validity_check()
-    url = f"https://oauth.reddit.com/api/subreddit_autocomplete_v2?query={keyword}&limit=10" 
+    url = f"{REDDIT_API_BASE_URL}/api/subreddit_autocomplete_v2?query={keyword}&limit=10" 
     headers = {
         "Authorization": f"Bearer {token}",
         "User-Agent": reddit_user_agent
@@ -102,27 +158,23 @@ def search_subreddits(keyword):
             error_detail += f", Response text: {response.text}"
         raise Exception(f"Subreddit search failed: {response.text}")
     
-def search_reddit_posts(keyword, limit=100, time_filter='all'):
-    cache_key = f"reddit_search:{keyword}:{limit}:{time_filter}"
-
-    cache_posts = cache_get(cache_key)
-    if cache_posts:
-        return cache_posts
-    
+def _fetch_search_page(keyword, limit, time_filter, after=None):
     token = token_validity_check()
-    url = f"https://oauth.reddit.com/search?q={keyword}&limit={limit}&sort=relevance"
+    url = f"{REDDIT_API_BASE_URL}/search"
+    params = {"q": keyword, "limit": limit, "sort": "relevance"}
     if time_filter != 'all':
-        url += f"&t={time_filter}"
+        params["t"] = time_filter
+    if after:
+        params["after"] = after
     headers = {
         "Authorization": f"Bearer {token}",
         "User-Agent": reddit_user_agent
     }
 
-    response = requests.get(url, headers=headers)
+    response = requests.get(url, headers=headers, params=params)
     if response.status_code == 200:
-        posts =  response.json()["data"]["children"]
-        cache_set(cache_key, posts)
-        return posts
+        data = response.json()["data"]
+        return data["children"], data.get("after")
     else:
         error_detail = f"Status Code: {response.status_code}"
         try:
@@ -133,3 +185,52 @@ def search_reddit_posts(keyword, limit=100, time_filter='all'):
             error_detail += f", Response text: {response.text}"
         raise Exception(f"Failed to search posts: {response.text}")
 
+def search_cache_key(keyword, time_filter):
+    return f"reddit_search:{normalize_keyword(keyword)}:{time_filter}"
+
+def search_page_count(limit):
+    return -(-limit // SEARCH_PAGE_SIZE)
+
+def _extend_search_results(keyword, limit, time_filter, posts, after):
+    while len(posts) < limit:
+        page, after = _fetch_search_page(keyword, min(SEARCH_PAGE_SIZE, limit - len(posts)), time_filter, after)
+        posts.extend(page)
+        if not after or not page:
+            after = None
+            break
+    return posts, after
+
+def search_reddit_posts(keyword, limit=100, time_filter='all'):
+    """
+    Search posts, sharing one cached result list per normalized keyword and
+    time filter across all limits.
+
+    A cached list at least `limit` long is sliced. A shorter one is extended
+    by fetching only the missing tail from Reddit's `after` cursor, unless
+    Reddit already reported there are no more results.
+    """
+    keyword = normalize_keyword(keyword)
+    cache_key = search_cache_key(keyword, time_filter)
+
+    cached = cache_get(cache_key)
+    if cached:
+        posts, after, fetched_at = cached["posts"], cached["after"], cached["fetched_at"]
+        if len(posts) >= limit or not after:
+            return posts[:limit]
+    else:
+        posts, after, fetched_at = [], None, time.time()
+
+    posts, after = _extend_search_results(keyword, limit, time_filter, posts, after)
+
+    # Keep the expiry of the first page when the list is extended, so older
+    # results are never held for longer than CACHE_TTL.
+    ttl = max(1, int(CACHE_TTL - (time.time() - fetched_at)))
+    cache_set(cache_key, {"posts": posts, "after": after, "fetched_at": fetched_at}, ttl)
+    return posts[:limit]
+
+def refresh_search_posts(keyword, limit=100, time_filter='all'):
+    """Fetch fresh search results and replace the cached list with a full TTL."""
+    keyword = normalize_keyword(keyword)
+    posts, after = _extend_search_results(keyword, limit, time_filter, [], None)
+    cache_set(search_cache_key(keyword, time_filter), {"posts": posts, "after": after, "fetched_at": time.time()})
+    return posts
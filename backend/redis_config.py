@@ -1,6 +1,6 @@
-import redis
 import os
 from dotenv import load_dotenv
+from lazy_client import LazyClient
 
 load_dotenv()
 
@@ -8,18 +8,49 @@ REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
+REDIS_CACHE_TIMEOUT = float(os.getenv("REDIS_CACHE_TIMEOUT", 0.25))
 
-redis_client = redis.Redis(
-    host=REDIS_HOST,
-    port=REDIS_PORT,
-    db=REDIS_DB,
-    password=REDIS_PASSWORD,
-    decode_responses=True
-)
+
+def _create_redis_client(**options):
+    import redis
+
+    return redis.Redis(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        db=REDIS_DB,
+        password=REDIS_PASSWORD,
+        decode_responses=True,
+        **options
+    )
+
+
+def _create_cache_redis_client():
+    from redis.backoff import NoBackoff
+    from redis.retry import Retry
+
+    return _create_redis_client(
+        socket_timeout=REDIS_CACHE_TIMEOUT,
+        socket_connect_timeout=REDIS_CACHE_TIMEOUT,
+        retry=Retry(NoBackoff(), 0)
+    )
+
+
+_redis_client = LazyClient(_create_redis_client)
+# Cache lookups use short timeouts and no retries so a slow or unreachable
+# Redis fails fast; blocking commands such as BRPOP need the default client.
+_cache_redis_client = LazyClient(_create_cache_redis_client)
+
+def get_redis_client():
+    return _redis_client.get()
+
+def get_cache_redis_client():
+    return _cache_redis_client.get()
 
 def test_redis_connection():
+    import redis
+
     try:
-        redis_client.ping()
+        get_redis_client().ping()
         print("Redis connection successful")
     except redis.ConnectionError as e:
         print(f"Redis connection failed: {str(e)}")
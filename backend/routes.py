@@ -1,26 +1,44 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import firestore_config
 import reddit_config
+import analysis
+import comments
+import jobs
+import popularity
+import trends
+import json
 import re
 from dotenv import load_dotenv
-from openai import OpenAI
 
 load_dotenv()
-client = OpenAI()
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    default_limits=["200 per day", "50 per hour"]
+)
 
 def init_routes(app):
-    limiter = Limiter(
-        key_func=get_remote_address,
-        default_limits=["200 per day", "50 per hour"]
-    )
     limiter.init_app(app)
     
     @app.route("/", methods=["GET"])
     def home():
         return jsonify({"message": "Welcome to Sentiscope!"})
     
+    @app.route("/cache/stats", methods=["GET"])
+    @limiter.exempt
+    def cache_stats():
+        return jsonify(reddit_config.search_cache.stats())
+
+    @app.route("/cache/prewarm", methods=["GET"])
+    @limiter.exempt
+    def prewarm_stats():
+        try:
+            return jsonify(popularity.stats())
+        except Exception as e:
+            return jsonify({"error": f"Failed to read prewarm stats: {str(e)}"}), 503
+
     @app.route("/signup", methods=["POST"])
     @limiter.limit("5 per minute")
     def sign_up():
@@ -42,7 +60,7 @@ def init_routes(app):
                 return jsonify({"error": "Password must be at least 6 characters long"}), 400
             
             try: 
-                user = firestore_config.auth.create_user(
+                user = firestore_config.get_auth().create_user(
                     email=new_user["email"],
                     password=new_user["password"]
                 )
@@ -55,17 +73,17 @@ def init_routes(app):
             uid = user.uid
 
             try:
-                custom_token = firestore_config.auth.create_custom_token(uid)
+                custom_token = firestore_config.get_auth().create_custom_token(uid)
             except Exception as e:
                 return jsonify({"error": "Failed to generate authentication token"}), 500
 
             try:
-                user_ref = firestore_config.db.collection('users').document(str(uid))
+                user_ref = firestore_config.get_db().collection('users').document(str(uid))
                 user_data = {
                     "name": new_user["name"],
                     "email": new_user["email"],
                     "plan": new_user["plan"],
-                    "created_at": firestore_config.firestore.SERVER_TIMESTAMP
+                    "created_at": firestore_config.server_timestamp()
                 } 
                 user_ref.set(user_data)
             except Exception as e:
@@ -106,14 +124,25 @@ def init_routes(app):
     @app.route("/fetch", methods=['GET'])
     @limiter.limit("20 per minute")
     def fetch_post():
+        """
+        Fetch, deduplicate and optionally attach comments synchronously.
+
+        This stays on the request thread for backward compatibility: the web
+        app renders its response directly. Large analyses should use POST /jobs.
+        """
         try:
             keyword = request.args.get('keyword', '').strip()
             limit = request.args.get('limit', '100')
             time_filter = request.args.get('filter', 'all')
+            dedup_enabled = request.args.get('dedup', 'true').lower() != 'false'
 
             if not keyword:
                 return jsonify({"error": "A valid keyword is required"}), 400
 
+            comment_options, error = comments.parse_comment_options(request.args)
+            if error:
+                return jsonify({"error": error}), 400
+
             try:
                 limit = int(limit)
                 if limit < 1 or limit > 1000:
@@ -125,40 +154,23 @@ def init_routes(app):
             if time_filter not in valid_filters:
                 return jsonify({"error": f"Invalid time filter. Must be one of: {', '.join(valid_filters)}"}), 400
 
+            popularity.record_request(keyword, time_filter, limit)
             try:
-                posts_data = reddit_config.search_reddit_posts(keyword, limit, time_filter)
-
-                all_posts = {}
-                for post in posts_data:
-                    post_data = post["data"]
-                    subreddit_name = post_data.get("subreddit", "Unknown")
-                    
-
-                    if subreddit_name not in all_posts:
-                        all_posts[subreddit_name] = []
-
-                    permalink = post_data.get("permalink", "")
-                    full_reddit_url = f"https://www.reddit.com{permalink}" if permalink else post_data.get("url", "https://reddit.com")
-
-                    all_posts[subreddit_name].append({
-                        "title": post_data.get("title", "Untitled"),
-                        "text": post_data.get("selftext", ""),
-                        "score": post_data.get("score", 0),
-                        "num_comments": post_data.get("num_comments", 0), 
-                        "url": full_reddit_url,
-                        "author": post_data.get("author", "Unknown"),
-                        "created_utc": post_data.get("created_utc", 0),
-                        "is_video": post_data.get("is_video", False),
-                        "upvote_ratio": post_data.get("upvote_ratio", 0),
-                        "subreddit": subreddit_name
-                    })
-
-                return jsonify({
-                        "keyword": keyword,
-                        "total_subreddits": len(all_posts),
-                        "subreddits": list(all_posts.keys()),
-                        "posts": all_posts
-                    })
+                all_posts, dedup_stats = analysis.fetch_posts(keyword, limit, time_filter, dedup_enabled)
+
+                if comment_options:
+                    posts = [post for subreddit_posts in all_posts.values() for post in subreddit_posts]
+                    comments.attach_comments(posts, comment_options["posts"], comment_options["limit"], comment_options["depth"])
+
+                response = {
+                    "keyword": keyword,
+                    "total_subreddits": len(all_posts),
+                    "subreddits": list(all_posts.keys()),
+                    "posts": all_posts
+                }
+                if dedup_stats is not None:
+                    response["dedup"] = dedup_stats
+                return jsonify(response)
                 
             except Exception as e:
                 return jsonify({"error": f"Search failed: {str(e)}"}), 500
@@ -167,9 +179,50 @@ def init_routes(app):
             return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
         
     
+    @app.route("/trends", methods=['GET'])
+    @limiter.limit("20 per minute")
+    def sentiment_trend():
+        try:
+            keyword = request.args.get('keyword', '').strip()
+            limit = request.args.get('limit', '100')
+            time_filter = request.args.get('filter', 'week')
+
+            if not keyword:
+                return jsonify({"error": "A valid keyword is required"}), 400
+
+            try:
+                limit = int(limit)
+                if limit < 1 or limit > 1000:
+                    return jsonify({"error": "Limit must be between 1 and 1000"}), 400
+            except ValueError:
+                return jsonify({"error": "Limit must be a valid number"}), 400
+
+            valid_filters = ['all', 'day', 'week', 'month', 'year']
+            if time_filter not in valid_filters:
+                return jsonify({"error": f"Invalid time filter. Must be one of: {', '.join(valid_filters)}"}), 400
+
+            interval = request.args.get('interval', 'hour' if time_filter in ('day', 'week') else 'day')
+            if interval not in trends.INTERVAL_SECONDS:
+                return jsonify({"error": f"Invalid interval. Must be one of: {', '.join(trends.INTERVAL_SECONDS)}"}), 400
+
+            popularity.record_request(keyword, time_filter, limit)
+            try:
+                return jsonify(trends.sentiment_trend(keyword, time_filter, interval, limit))
+            except Exception as e:
+                return jsonify({"error": f"Trend analysis failed: {str(e)}"}), 500
+
+        except Exception as e:
+            return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
+
     @app.route("/generateSummary", methods=["POST"])
     @limiter.limit("15 per minute")
     def generateSummary():
+        """
+        Summarize the posts the client already fetched, synchronously.
+
+        Kept on the request thread for backward compatibility with the web
+        app; background jobs generate their summary in the worker instead.
+        """
         try:
             data = request.get_json()
             if not data:
@@ -190,64 +243,12 @@ def init_routes(app):
             if not all(field in sentiment_data for field in required_sentiment_fields):
                 return jsonify({"error": "Invalid sentiment data structure"}), 400
 
-            post_summaries = []
-            for i, p in enumerate(posts[:6]):
-                if isinstance(p, dict):
-                    title = p.get('title', '')
-                    text = p.get('text', '')
-                    score = p.get('score', 0)
-                    subreddit = p.get('subreddit', '')
-                    
-                    content = f"{title}. {text}".strip()
-                    if len(content) > 150:
-                        content = content[:150] + "..."
-                    
-                    if content and len(content.strip('. ')) > 10:
-                        post_summaries.append(f"r/{subreddit}: {content} ({score} upvotes)")
-                    elif title.strip():
-                        post_summaries.append(f"r/{subreddit}: {title} ({score} upvotes)")
-            
-            if not post_summaries:
+            prompts = analysis.build_summary_prompt(keyword, sentiment_data, posts)
+            if prompts is None:
                 return jsonify({"error": "No valid posts found for summary generation"}), 400
-                
-            system_prompt = (
-                "You are an expert sentiment analyst specializing in Reddit community analysis. "
-                "Provide comprehensive, insightful analysis that explains WHY the sentiment exists by examining actual post content and context. "
-                "Use specific examples from posts to support your analysis. Create a well-structured, detailed summary with multiple sections. "
-                "For financial topics, discuss whether the community is bullish/bearish and explain the reasoning."
-            )
-
-            prompt = (
-                f"Analyze the sentiment for '{keyword}' based on Reddit community discussions.\n\n"
-                f"SENTIMENT DATA:\n"
-                f"Overall: {sentiment_data['sentiment']} ({sentiment_data.get('positive_percentage', 0)}% positive, {sentiment_data.get('negative_percentage', 0)}% negative)\n\n"
-                f"SAMPLE POSTS:\n" + "\n".join(post_summaries) + "\n\n"
-                f"Provide a comprehensive analysis with the following structure:\n\n"
-                f"### 📊 Sentiment Overview\n"
-                f"[Detailed explanation of why the sentiment is {sentiment_data['sentiment']} based on the post content and community discussions]\n\n"
-                f"### 🔍 Key Themes & Insights\n"
-                f"• **[Theme 1]:** [Detailed insight with specific examples from posts]\n"
-                f"• **[Theme 2]:** [Another insight with context and evidence]\n"
-                f"• **[Theme 3]:** [Third insight explaining sentiment drivers]\n"
-                f"• **[Theme 4]:** [Additional insight about implications or trends]\n\n"
-                f"### 💡 Community Perspective\n"
-                f"[Explain what this sentiment tells us about how the community views this topic, including any notable patterns, concerns, or excitement]\n\n"
-                f"### 🎯 What This Means\n"
-                f"[Practical interpretation of the sentiment - what should someone understand about the community's current stance on this topic]"
-                + (f"\n\n### ⚠️ Disclaimer\n[Standard investment disclaimer noting this is for informational purposes only]" if any(word in keyword.lower() for word in ['stock', 'crypto', 'invest', 'trade', '$', 'nvda', 'tesla', 'bitcoin', 'eth', 'amd', 'msft', 'aapl']) else "")
-            )
 
             try:
-                ai = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=700,
-                    temperature=0.4
-                )
-                summary_text = ai.choices[0].message.content.strip()
+                summary_text = analysis.generate_summary(*prompts)
             except Exception as e:
                 return jsonify({"error": f"Failed to generate AI summary: {e}"}), 500
 
@@ -257,3 +258,92 @@ def init_routes(app):
             })
         except Exception as e:
             return jsonify({"error": "Internal server error"}), 500
+
+    @app.route("/jobs", methods=["POST"])
+    @limiter.limit("20 per minute")
+    def submit_job():
+        try:
+            data = request.get_json(silent=True)
+            if not data:
+                return jsonify({"error": "Request body is required"}), 400
+
+            keyword = str(data.get("keyword", "")).strip()
+            limit = data.get("limit", 100)
+            time_filter = data.get("filter", "all")
+
+            if not keyword:
+                return jsonify({"error": "A valid keyword is required"}), 400
+
+            try:
+                limit = int(limit)
+                if limit < 1 or limit > 1000:
+                    return jsonify({"error": "Limit must be between 1 and 1000"}), 400
+            except (TypeError, ValueError):
+                return jsonify({"error": "Limit must be a valid number"}), 400
+
+            valid_filters = ['all', 'day', 'week', 'month', 'year']
+            if time_filter not in valid_filters:
+                return jsonify({"error": f"Invalid time filter. Must be one of: {', '.join(valid_filters)}"}), 400
+
+            comment_options, error = comments.parse_comment_options(data)
+            if error:
+                return jsonify({"error": error}), 400
+
+            params = {
+                "keyword": keyword,
+                "limit": limit,
+                "filter": time_filter,
+                "dedup": str(data.get("dedup", "true")).lower() != "false",
+                "summary": str(data.get("summary", "true")).lower() != "false",
+                "comments": comment_options
+            }
+
+            popularity.record_request(keyword, time_filter, limit)
+            try:
+                job_id, deduplicated = jobs.submit_job(params)
+            except Exception as e:
+                return jsonify({"error": f"Failed to queue analysis: {str(e)}"}), 503
+
+            return jsonify({
+                "job_id": job_id,
+                "status_url": f"/jobs/{job_id}",
+                "events_url": f"/jobs/{job_id}/events",
+                "deduplicated": deduplicated
+            }), 202
+        except Exception as e:
+            return jsonify({"error": "Internal server error"}), 500
+
+    @app.route("/jobs/<job_id>", methods=["GET"])
+    @limiter.exempt
+    def get_job(job_id):
+        try:
+            job = jobs.get_job(job_id)
+        except Exception as e:
+            return jsonify({"error": f"Failed to read job: {str(e)}"}), 503
+        if job is None:
+            return jsonify({"error": "Job not found or expired"}), 404
+        return jsonify(job)
+
+    @app.route("/jobs/<job_id>/events", methods=["GET"])
+    @limiter.exempt
+    def job_events(job_id):
+        def stream():
+            try:
+                for event in jobs.iter_job_events(job_id):
+                    if event is None:
+                        yield ": keep-alive\n\n"
+                        continue
+                    status = event.get("status")
+                    name = status if status in jobs.TERMINAL_STATUSES else "progress"
+                    yield f"event: {name}\ndata: {json.dumps(event)}\n\n"
+            except Exception as e:
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+        try:
+            job = jobs.get_job(job_id)
+        except Exception as e:
+            return jsonify({"error": f"Failed to read job: {str(e)}"}), 503
+        if job is None:
+            return jsonify({"error": "Job not found or expired"}), 404
+        return Response(stream_with_context(stream()), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
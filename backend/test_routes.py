@@ -1,6 +1,10 @@
 import pytest
 import json
-from unittest.mock import patch, MagicMock
+import logging
+import os
+import subprocess
+import sys
+from unittest.mock import ANY, patch, MagicMock
 from app import create_app
 
 @pytest.fixture
@@ -11,7 +15,10 @@ def app():
 
 @pytest.fixture
 def client(app):
-    return app.test_client()
+    # Routes record keyword popularity in Redis; keep the tests independent
+    # of whether a local Redis server is running.
+    with patch('routes.popularity.record_request'):
+        yield app.test_client()
 
 def test_home_endpoint(client):
     response = client.get('/')
@@ -49,31 +56,28 @@ def test_signup_short_password(client):
     data = json.loads(response.data)
     assert 'Password must be at least 6 characters long' in data['error']
 
-@patch('routes.firestore_config.auth.create_user')
-def test_signup_success(mock_create_user, client):
+@patch('routes.firestore_config.get_db')
+@patch('routes.firestore_config.get_auth')
+def test_signup_success(mock_get_auth, mock_get_db, client):
     mock_user = MagicMock()
     mock_user.uid = 'test-uid'
-    mock_create_user.return_value = mock_user
-    
-    with patch('routes.firestore_config.auth.create_custom_token') as mock_token, \
-         patch('routes.firestore_config.db.collection') as mock_collection:
-        
-        mock_token.return_value = b'test-token'
-        mock_doc = MagicMock()
-        mock_collection.return_value.document.return_value = mock_doc
-        
+    mock_get_auth.return_value.create_user.return_value = mock_user
+    mock_get_auth.return_value.create_custom_token.return_value = b'test-token'
+
+    with patch('routes.firestore_config.server_timestamp', return_value='now'):
         user_data = {
             "name": "Test User",
             "email": "test@example.com",
             "password": "password123",
             "plan": "free"
         }
-        
+
         response = client.post('/signup', json=user_data)
         assert response.status_code == 201
         data = json.loads(response.data)
         assert data['message'] == 'User signed up successfully!'
         assert 'custom_token' in data
+        mock_get_db.return_value.collection.return_value.document.return_value.set.assert_called_once()
 
 def test_analyze_missing_keyword(client):
     response = client.post('/analyze', json={})
@@ -142,3 +146,572 @@ def test_generate_summary_missing_posts(client):
     assert response.status_code == 400
     data = json.loads(response.data)
     assert 'Posts array is required' in data['error']
+
+
+# `import app` measures 2.0-2.7x a bare `import flask` on the same machine;
+# comparing against that baseline keeps the check meaningful on slower runners.
+IMPORT_BUDGET_FLASK_RATIO = 4.0
+
+def _import_seconds(module):
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(elapsed)\n"
+        "print(','.join(m for m in ('openai', 'firebase_admin', 'redis') if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    elapsed, loaded = result.stdout.splitlines()[-2:]
+    return float(elapsed), loaded
+
+def test_import_does_not_build_clients():
+    runs = [_import_seconds("app") for _ in range(3)]
+    assert all(loaded == "" for _, loaded in runs)
+    baseline = min(_import_seconds("flask")[0] for _ in range(3))
+    assert min(elapsed for elapsed, _ in runs) < baseline * IMPORT_BUDGET_FLASK_RATIO
+
+def test_import_time_is_logged_by_default(app):
+    assert app.logger.isEnabledFor(logging.INFO)
+
+def test_invalid_log_level_falls_back_to_info(monkeypatch):
+    monkeypatch.setenv('LOG_LEVEL', 'verbose')
+    app = create_app()
+    assert app.logger.level == logging.INFO
+
+def test_clients_are_created_once():
+    from lazy_client import LazyClient
+    factory = MagicMock(side_effect=lambda: object())
+    lazy = LazyClient(factory)
+    assert not lazy.is_initialized()
+    assert lazy.get() is lazy.get()
+    assert factory.call_count == 1
+
+def _reddit_post(subreddit, title, text, score=10):
+    return {"data": {"subreddit": subreddit, "title": title, "selftext": text, "score": score, "permalink": f"/r/{subreddit}/x/"}}
+
+@patch('analysis.reddit_config.search_reddit_posts')
+def test_fetch_collapses_duplicates(mock_search, client):
+    text = "The battery life numbers look incredible, honestly the best laptop upgrade in years."
+    mock_search.return_value = [
+        _reddit_post("technology", "New MacBook", text),
+        _reddit_post("apple", "New MacBook", text),
+        _reddit_post("mac", "New MacBook", text.replace("honestly ", "honestly, ") + " Wow!"),
+        _reddit_post("stocks", "AAPL earnings", "Guidance was weak and services growth slowed this quarter."),
+    ]
+    response = client.get('/fetch?keyword=apple')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['dedup']['total_posts'] == 4
+    assert data['dedup']['unique_posts'] == 2
+    kept = data['posts']['technology'][0]
+    assert kept['duplicate_count'] == 3
+    assert kept['weight'] == 3
+    assert kept['duplicate_subreddits'] == ['apple', 'mac']
+    assert 'apple' not in data['posts']
+
+@patch('analysis.reddit_config.search_reddit_posts')
+def test_fetch_dedup_disabled(mock_search, client):
+    mock_search.return_value = [_reddit_post("a", "Same title", ""), _reddit_post("b", "Same title", "")]
+    response = client.get('/fetch?keyword=apple&dedup=false')
+    data = json.loads(response.data)
+    assert 'dedup' not in data
+    assert data['total_subreddits'] == 2
+
+def test_collapse_keeps_unrelated_link_posts():
+    from dedup import collapse_duplicates
+    posts = [
+        {"title": "Model Y refresh spotted testing", "text": "https://i.redd.it/abc123.jpg"},
+        {"title": "Cybertruck recall announced", "text": "https://www.reuters.com/business/autos/"},
+        {"title": "Tesla Q3 deliveries beat estimates", "text": "Title says it all."},
+        {"title": "Supercharger network opens to Ford", "text": "Title says it all."},
+        {"title": "", "text": "\U0001F680\U0001F680"},
+        {"title": "", "text": "https://youtu.be/xyz"},
+    ]
+    unique, stats = collapse_duplicates(posts)
+    assert len(unique) == 6
+    assert stats["duplicates_removed"] == 0
+
+def test_simhash_near_duplicates():
+    from dedup import simhash, tokenize, hamming_distance
+    a = tokenize("Vision Pro two weeks later: amazing display, but it is heavy and there are barely any apps")
+    b = tokenize("Vision Pro two weeks later - amazing display but it is heavy and there are barely any apps!!")
+    c = tokenize("Apple fined by EU over App Store rules, terrible for developers everywhere")
+    assert hamming_distance(simhash(a), simhash(b)) == 0
+    assert hamming_distance(simhash(a), simhash(c)) > 3
+
+def test_submit_job_invalid_limit(client):
+    response = client.post('/jobs', json={"keyword": "apple", "limit": 5000})
+    assert response.status_code == 400
+    data = json.loads(response.data)
+    assert 'Limit must be between 1 and 1000' in data['error']
+
+@patch('routes.jobs.submit_job')
+def test_submit_job_returns_id(mock_submit, client):
+    mock_submit.return_value = ('abc123', False)
+    response = client.post('/jobs', json={"keyword": "  apple ", "limit": 500, "filter": "week"})
+    assert response.status_code == 202
+    data = json.loads(response.data)
+    assert data['job_id'] == 'abc123'
+    assert data['events_url'] == '/jobs/abc123/events'
+    mock_submit.assert_called_once_with({
+        "keyword": "apple", "limit": 500, "filter": "week", "dedup": True, "summary": True, "comments": None
+    })
+
+@patch('routes.jobs.get_job')
+def test_get_job_not_found(mock_get_job, client):
+    mock_get_job.return_value = None
+    response = client.get('/jobs/missing')
+    assert response.status_code == 404
+
+@patch('routes.jobs.iter_job_events')
+@patch('routes.jobs.get_job')
+def test_job_events_stream(mock_get_job, mock_iter, client):
+    mock_get_job.return_value = {"id": "abc", "status": "queued"}
+    mock_iter.return_value = iter([
+        {"id": "abc", "status": "running", "stage": "fetch", "progress": 5},
+        None,
+        {"id": "abc", "status": "completed", "progress": 100, "result": {"summary": "ok"}},
+    ])
+    response = client.get('/jobs/abc/events')
+    body = response.get_data(as_text=True)
+    assert response.mimetype == 'text/event-stream'
+    assert 'event: progress' in body
+    assert ': keep-alive' in body
+    assert 'event: completed' in body
+
+@patch('routes.jobs.get_job', side_effect=Exception("Connection refused"))
+def test_job_events_redis_error(mock_get_job, client):
+    response = client.get('/jobs/abc/events')
+    assert response.status_code == 503
+
+@patch('routes.jobs.submit_job')
+def test_submit_job_parses_string_flags(mock_submit, client):
+    mock_submit.return_value = ("abc123", False)
+    client.post('/jobs', json={"keyword": "apple", "dedup": "false", "summary": False})
+    params = mock_submit.call_args.args[0]
+    assert params["dedup"] is False
+    assert params["summary"] is False
+
+@patch('jobs.update_job')
+@patch('jobs.get_redis_client')
+def test_requeue_stale_jobs(mock_get_redis, mock_update):
+    import time
+    import jobs
+    client = mock_get_redis.return_value
+    now = time.time()
+    client.lrange.return_value = ["stale", "fresh", "waited", "unstamped", "expired", "exhausted"]
+    client.hmget.side_effect = lambda key, fields: {
+        "job:stale": [now - 1000, now - 1000, "1"],
+        "job:fresh": [now - 1000, now - 10, "1"],
+        # Queued long before a worker claimed it a moment ago
+        "job:waited": [now - 10, now - 1000, "1"],
+        "job:unstamped": [None, now - 1000, "1"],
+        "job:expired": [None, None, None],
+        "job:exhausted": [now - 1000, now - 1000, "3"],
+    }[key]
+    client.lrem.return_value = 1
+
+    assert jobs.requeue_stale_jobs(stale_after=300, max_attempts=3) == 2
+
+    assert [c.args[2] for c in client.lrem.call_args_list] == ["stale", "expired", "exhausted"]
+    client.pipeline.return_value.hsetnx.assert_called_once_with("job:unstamped", "claimed_at", ANY)
+    client.hdel.assert_called_once_with("job:stale", "claimed_at")
+    client.rpush.assert_called_once_with(jobs.JOB_QUEUE_KEY, "stale")
+    assert mock_update.call_args_list[0].args == ("stale",)
+    assert mock_update.call_args_list[0].kwargs["attempts"] == 2
+    assert mock_update.call_args_list[1].kwargs["status"] == jobs.STATUS_FAILED
+
+@patch('jobs.get_redis_client')
+def test_next_job_stamps_claim(mock_get_redis):
+    import jobs
+    client = mock_get_redis.return_value
+    client.blmove.return_value = "abc"
+    pipe = MagicMock()
+    pipe.exists.return_value = 1
+    client.transaction.side_effect = lambda func, *keys, **kwargs: func(pipe)
+
+    assert jobs.next_job() == "abc"
+
+    mapping = pipe.hset.call_args.kwargs["mapping"]
+    assert mapping["status"] == jobs.STATUS_RUNNING
+    assert mapping["claimed_at"] == mapping["updated_at"]
+
+    pipe.reset_mock()
+    pipe.exists.return_value = 0
+    assert jobs.next_job() is None
+    pipe.hset.assert_not_called()
+    pipe.lrem.assert_called_once_with(jobs.JOB_PROCESSING_KEY, 1, "abc")
+
+@patch('worker.jobs.ack_job')
+@patch('worker.jobs.update_job')
+@patch('worker.jobs.get_job')
+@patch('worker.analysis')
+def test_worker_runs_stages(mock_analysis, mock_get_job, mock_update, mock_ack):
+    import worker
+    mock_get_job.return_value = {"params": {"keyword": "apple", "limit": 10, "filter": "all", "summary": True}}
+    mock_analysis.fetch_posts.return_value = ({"tech": [{"title": "t", "text": "great"}]}, None)
+    mock_analysis.classify_posts.return_value = {"sentiment": "Positive", "positive_percentage": 70, "negative_percentage": 30}
+    mock_analysis.build_summary_prompt.return_value = ("system", "prompt")
+    mock_analysis.generate_summary.return_value = "summary"
+
+    worker.run_job("abc")
+
+    stages = [call.kwargs.get("stage") for call in mock_update.call_args_list]
+    assert stages == ["fetch", "classify", "summarize", "done"]
+    final = mock_update.call_args_list[-1].kwargs
+    assert final["status"] == "completed"
+    assert final["result"]["summary"] == "summary"
+    mock_ack.assert_called_once_with("abc")
+
+@patch('routes.trends.sentiment_trend', return_value={"buckets": []})
+def test_trends_records_popularity(mock_trend, client):
+    import routes
+    response = client.get('/trends?keyword=Apple&filter=day&limit=50')
+    assert response.status_code == 200
+    routes.popularity.record_request.assert_called_once_with("Apple", "day", 50)
+
+def test_trends_invalid_interval(client):
+    response = client.get('/trends?keyword=apple&interval=minute')
+    assert response.status_code == 400
+    data = json.loads(response.data)
+    assert 'Invalid interval' in data['error']
+
+def test_bucket_posts():
+    from trends import bucket_posts
+    buckets, counts, positive_sums = bucket_posts(
+        [3600, 3700, 7300, 7199], [0.8, 0.4, 0.1, 0.6], 3600
+    )
+    assert buckets.tolist() == [3600, 7200]
+    assert counts.tolist() == [3, 1]
+    assert positive_sums.tolist() == pytest.approx([1.8, 0.1])
+
+@patch('trends.get_redis_client')
+@patch('trends.analysis.classify_texts')
+def test_trend_merge_skips_seen_posts(mock_classify, mock_get_redis):
+    import trends
+    redis_client = mock_get_redis.return_value
+    mock_classify.return_value = {"probabilities": [0.9]}
+    posts = [
+        {"id": "old", "text": "seen before", "created_utc": 3600},
+        {"id": "copy-owner", "text": "crosspost", "created_utc": 3700, "duplicate_ids": ["old-copy"]},
+        {"id": "new", "text": "brand new", "created_utc": 7300},
+    ]
+    redis_client.smismember.return_value = [1, 0, 1, 0]
+    pipe = redis_client.pipeline.return_value
+    pipe.execute.side_effect = [[1], []]
+
+    merged = trends.merge_posts("Apple", "hour", posts)
+
+    assert merged == 1
+    mock_classify.assert_called_once_with(["brand new"], return_probabilities=True)
+    pipe.sadd.assert_called_once_with("trend:apple:hour:seen", "new")
+    pipe.zadd.assert_called_once_with("trend:apple:hour:buckets", {"7200": 7200})
+    pipe.hincrby.assert_called_once_with("trend:apple:hour:stats", "7200:count", 1)
+
+@patch('trends.get_redis_client')
+@patch('trends.analysis.classify_texts')
+def test_trend_merge_skips_posts_claimed_concurrently(mock_classify, mock_get_redis):
+    import trends
+    redis_client = mock_get_redis.return_value
+    redis_client.smismember.return_value = [0]
+    # Another merge added the id between the membership check and the claim.
+    redis_client.pipeline.return_value.execute.return_value = [0]
+
+    assert trends.merge_posts("apple", "hour", [{"id": "a", "text": "hello", "created_utc": 3600}]) == 0
+    mock_classify.assert_not_called()
+
+@patch('trends.get_redis_client')
+@patch('trends.analysis.classify_texts')
+def test_trend_merge_skips_unclassifiable_posts(mock_classify, mock_get_redis):
+    import analysis
+    import trends
+    redis_client = mock_get_redis.return_value
+    redis_client.smismember.return_value = [0]
+    pipe = redis_client.pipeline.return_value
+    pipe.execute.side_effect = [[1], []]
+    mock_classify.side_effect = analysis.NoValidTextError("No valid text found for analysis")
+
+    merged = trends.merge_posts("apple", "hour", [{"id": "a", "text": "https://i.redd.it/x.jpg", "created_utc": 3600}])
+
+    assert merged == 1
+    pipe.hincrby.assert_not_called()
+    redis_client.srem.assert_not_called()
+
+def test_fetch_comment_options_bounded(client):
+    response = client.get('/fetch?keyword=apple&comments=true&comment_depth=9')
+    assert response.status_code == 400
+    data = json.loads(response.data)
+    assert 'comment_depth must be between 1 and 5' in data['error']
+
+def test_flatten_comments_respects_depth():
+    from reddit_config import flatten_comments
+    reply = {"kind": "t1", "data": {"id": "c2", "body": "reply", "score": 1, "replies": ""}}
+    children = [
+        {"kind": "t1", "data": {"id": "c1", "body": "top", "score": 5,
+                                "replies": {"data": {"children": [reply]}}}},
+        {"kind": "t1", "data": {"id": "c3", "body": "[deleted]", "score": 0, "replies": ""}},
+        {"kind": "more", "data": {"children": ["c4"]}},
+    ]
+    assert [c["id"] for c in flatten_comments(children, 1)] == ["c1"]
+    assert [c["id"] for c in flatten_comments(children, 2)] == ["c1", "c2"]
+
+@patch('comments.reddit_config.fetch_post_comments')
+def test_comment_fetch_uses_cache(mock_fetch):
+    import comments
+    from tiered_cache import L1Cache, CircuitBreaker, TieredCache
+    redis_client = MagicMock()
+    redis_client.mget.return_value = [json.dumps([{"body": "cached"}]), None]
+    mock_fetch.return_value = [{"body": "fresh"}]
+
+    cache = TieredCache(L1Cache(1024, 60), CircuitBreaker(), lambda: redis_client)
+    with patch('comments.reddit_config.search_cache', cache):
+        results = dict(comments.iter_post_comments(["a", "b"], limit=5, depth=2))
+
+    assert results == {"a": [{"body": "cached"}], "b": [{"body": "fresh"}]}
+    mock_fetch.assert_called_once_with("b", 5, 2)
+    redis_client.setex.assert_called_once()
+
+@patch('comments.reddit_config.fetch_post_comments')
+def test_comment_fetch_skips_cache_when_circuit_open(mock_fetch):
+    import comments
+    from tiered_cache import L1Cache, CircuitBreaker, TieredCache
+    redis_client = MagicMock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    mock_fetch.return_value = [{"body": "fresh"}]
+
+    with patch('comments.reddit_config.search_cache', TieredCache(L1Cache(1024, 60), breaker, lambda: redis_client)):
+        results = dict(comments.iter_post_comments(["a"], limit=5, depth=1))
+
+    assert results == {"a": [{"body": "fresh"}]}
+    redis_client.mget.assert_not_called()
+    redis_client.setex.assert_not_called()
+
+@patch('comments.analysis.classify_texts')
+def test_classify_comment_stream_batches(mock_classify):
+    import comments
+    mock_classify.side_effect = lambda texts, return_probabilities: {"probabilities": [0.8] * len(texts)}
+    stream = [("a", [{"body": "x"}] * 3), ("b", [{"body": "y"}] * 2)]
+
+    result = comments.classify_comment_stream(iter(stream), batch_size=2)
+
+    assert [len(call.args[0]) for call in mock_classify.call_args_list] == [2, 2, 1]
+    assert result["comment_count"] == 5
+    assert result["posts"]["a"]["count"] == 3
+    assert result["positive_percentage"] == pytest.approx(80.0)
+
+@patch('comments.analysis.classify_texts')
+def test_classify_comment_stream_skips_unclassifiable_batch(mock_classify):
+    import analysis
+    import comments
+
+    def classify(texts, return_probabilities):
+        if all(text.startswith("https://") for text in texts):
+            raise analysis.NoValidTextError("No valid text found for analysis")
+        return {"probabilities": [0.6] * len(texts)}
+
+    mock_classify.side_effect = classify
+    stream = [("a", [{"body": "great thread"}, {"body": "agreed"}]), ("b", [{"body": "https://imgur.com/x"}])]
+
+    result = comments.classify_comment_stream(iter(stream), batch_size=2)
+
+    assert result["comment_count"] == 2
+    assert list(result["posts"]) == ["a"]
+
+def test_l1_cache_evicts_by_size():
+    from tiered_cache import L1Cache
+    l1 = L1Cache(max_bytes=10, default_ttl=60)
+    l1.set("a", "12345")
+    l1.set("b", "12345")
+    assert l1.get("a") == "12345"
+    l1.set("c", "123")
+    assert l1.get("b") is None
+    assert l1.get("a") == "12345"
+    assert l1.usage()["bytes"] == 8
+
+def test_tiered_cache_skips_redis_when_circuit_open():
+    from tiered_cache import L1Cache, CircuitBreaker, TieredCache
+    redis_client = MagicMock()
+    redis_client.pipeline.return_value.execute.side_effect = ConnectionError("down")
+    cache = TieredCache(L1Cache(1024, 60), CircuitBreaker(failure_threshold=2, reset_timeout=60), lambda: redis_client)
+
+    assert cache.get("k") is None
+    assert cache.get("k") is None
+    assert cache.get("k") is None
+    assert redis_client.pipeline.return_value.execute.call_count == 2
+
+    cache.set("k", "v", 600)
+    assert cache.get("k") == "v"
+    stats = cache.stats()
+    assert stats["circuit_state"] == "open"
+    assert stats["redis_skipped"] == 2
+    assert stats["l1_hits"] == 1
+
+def test_tiered_cache_promotes_l2_hits():
+    from tiered_cache import L1Cache, CircuitBreaker, TieredCache
+    redis_client = MagicMock()
+    redis_client.pipeline.return_value.execute.return_value = ["cached", 30000]
+    cache = TieredCache(L1Cache(1024, 60), CircuitBreaker(), lambda: redis_client)
+
+    assert cache.get("k") == "cached"
+    assert cache.get("k") == "cached"
+    assert redis_client.pipeline.return_value.execute.call_count == 1
+    stats = cache.stats()
+    assert stats["l2_hits"] == 1
+    assert stats["l1_hit_ratio"] == 0.5
+
+def test_tiered_cache_l1_copy_expires_with_redis():
+    import time
+    from tiered_cache import L1Cache, CircuitBreaker, TieredCache
+    redis_client = MagicMock()
+    redis_client.pipeline.return_value.execute.side_effect = [["cached", 200], [None, -2]]
+    cache = TieredCache(L1Cache(1024, 60), CircuitBreaker(), lambda: redis_client)
+
+    assert cache.get("k") == "cached"
+    time.sleep(0.25)
+    assert cache.get("k") is None
+    assert cache.stats()["misses"] == 1
+
+def test_cache_stats_endpoint(client):
+    response = client.get('/cache/stats')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert 'l1_hit_ratio' in data
+    assert 'circuit_state' in data
+
+def _search_page(start, count):
+    return [{"data": {"id": f"p{i}"}} for i in range(start, start + count)]
+
+@patch('reddit_config._fetch_search_page')
+def test_search_reuses_cached_superset(mock_page):
+    import reddit_config
+    store = {}
+    mock_page.side_effect = [
+        (_search_page(0, 50), "cursor50"),
+        (_search_page(50, 100), "cursor150"),
+        (_search_page(150, 30), None),
+    ]
+    with patch('reddit_config.cache_get', side_effect=store.get), \
+         patch('reddit_config.cache_set', side_effect=lambda key, data, ttl=600: store.__setitem__(key, data)):
+        first = reddit_config.search_reddit_posts("  Apple   Stock ", 50, "week")
+        smaller = reddit_config.search_reddit_posts("apple stock", 20, "week")
+        larger = reddit_config.search_reddit_posts("APPLE STOCK", 200, "week")
+        exhausted = reddit_config.search_reddit_posts("apple stock", 500, "week")
+
+    assert len(first) == 50
+    assert smaller == first[:20]
+    assert [p["data"]["id"] for p in larger] == [f"p{i}" for i in range(180)]
+    assert len(exhausted) == 180
+    assert list(store) == ["reddit_search:apple stock:week"]
+    assert [c.args for c in mock_page.call_args_list] == [
+        ("apple stock", 50, "week", None),
+        ("apple stock", 100, "week", "cursor50"),
+        ("apple stock", 50, "week", "cursor150"),
+    ]
+
+def test_record_request_counts_prewarm_hits():
+    import time
+    import popularity
+    from tiered_cache import L1Cache, CircuitBreaker, TieredCache
+    client = MagicMock()
+    client.pipeline.return_value.execute.side_effect = [
+        [1.0, time.time() + 120, 1, 0],
+        [2.0, time.time() - 5, 1, 0],
+        [3.0, None, 0, 1],
+    ]
+    cache = TieredCache(L1Cache(1024, 60), CircuitBreaker(), lambda: client)
+    with patch('popularity.reddit_config.search_cache', cache):
+        for _ in range(3):
+            popularity.record_request("  Apple Stock", "week", 100)
+
+    client.pipeline.return_value.zincrby.assert_called_with(popularity.POPULARITY_KEY, 1, "week:100:apple stock")
+    client.pipeline.return_value.srem.assert_called_with(popularity.PREWARM_IDLE_KEY, "reddit_search:apple stock:week")
+    assert [c.args for c in client.hincrby.call_args_list] == [
+        (popularity.PREWARM_STATS_KEY, "hits", 1),
+        (popularity.PREWARM_STATS_KEY, "wasted", 1),
+    ]
+
+def test_record_request_skips_redis_when_circuit_open():
+    import popularity
+    from tiered_cache import L1Cache, CircuitBreaker, TieredCache
+    client = MagicMock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    with patch('popularity.reddit_config.search_cache', TieredCache(L1Cache(1024, 60), breaker, lambda: client)):
+        popularity.record_request("apple", "all", 100)
+    client.pipeline.assert_not_called()
+
+def test_request_budget_limits_spending():
+    from prewarmer import RequestBudget
+    budget = RequestBudget(per_minute=3)
+    assert budget.try_spend(2)
+    assert budget.try_spend(1)
+    assert not budget.try_spend(1)
+
+@patch('prewarmer.prewarm_analysis')
+@patch('prewarmer.reddit_config.refresh_search_posts')
+@patch('prewarmer.popularity')
+@patch('prewarmer.get_redis_client')
+def test_prewarm_cycle_refreshes_expiring_keywords(mock_get_redis, mock_popularity, mock_refresh, mock_analysis):
+    import prewarmer
+    mock_popularity.top_requests.return_value = [
+        ("apple", "week", 100, 5.0),
+        ("tesla", "all", 100, 4.0),
+        ("apple", "week", 150, 3.0),
+        ("nvidia", "all", 300, 2.0),
+    ]
+    # apple is about to expire, tesla is still fresh and nvidia is not cached.
+    mock_get_redis.return_value.pipeline.return_value.execute.return_value = [
+        30, None, False,
+        500, None, False,
+        -2, None, False,
+    ]
+
+    summary = prewarmer.run_cycle(prewarmer.RequestBudget(per_minute=3), min_score=2)
+
+    assert summary == {"refreshed": 1, "skipped_budget": 1, "skipped_unread": 0, "failures": 0}
+    mock_popularity.top_requests.assert_called_once_with(mock_get_redis.return_value, prewarmer.PREWARM_TOP_N, 2)
+    mock_refresh.assert_called_once_with("apple", 150, "week")
+    assert [c.args for c in mock_analysis.call_args_list] == [("apple", "week", 100), ("apple", "week", 150)]
+    mock_popularity.mark_prewarmed.assert_called_once()
+    mock_popularity.count.assert_called_once_with(mock_get_redis.return_value, "skipped_budget", 1)
+
+@patch('prewarmer.prewarm_analysis')
+@patch('prewarmer.reddit_config.refresh_search_posts')
+@patch('prewarmer.popularity')
+@patch('prewarmer.get_redis_client')
+def test_prewarm_cycle_skips_unread_refreshes(mock_get_redis, mock_popularity, mock_refresh, mock_analysis):
+    import prewarmer
+    mock_popularity.top_requests.return_value = [("apple", "week", 100, 5.0), ("tesla", "all", 100, 4.0)]
+    # apple's last refresh is still unread; tesla's expired unread and is idle.
+    mock_get_redis.return_value.pipeline.return_value.execute.return_value = [
+        30, 1e12, False,
+        -2, None, True,
+    ]
+
+    summary = prewarmer.run_cycle(prewarmer.RequestBudget(per_minute=100))
+
+    assert summary["skipped_unread"] == 2
+    mock_refresh.assert_not_called()
+
+@patch('analysis.reddit_config.cache_set')
+@patch('analysis.reddit_config.cache_get', return_value="Cached summary")
+def test_generate_summary_extends_cached_result(mock_cache_get, mock_cache_set):
+    import analysis
+    assert analysis.generate_summary("system", "prompt", extend_ttl=True) == "Cached summary"
+    mock_cache_set.assert_called_once_with(mock_cache_get.call_args.args[0], "Cached summary")
+
+@patch('analysis.get_openai_client')
+@patch('analysis.reddit_config.cache_get', return_value="Cached summary")
+def test_generate_summary_reuses_cached_result(mock_cache_get, mock_openai):
+    import analysis
+    assert analysis.generate_summary("system", "prompt") == "Cached summary"
+    assert mock_cache_get.call_args.args[0].startswith("summary:")
+    mock_openai.assert_not_called()
@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class L1Cache:
+    """
+    In-process LRU cache with per-entry TTL and a total size budget in bytes.
+
+    Values are stored as the serialized strings written to Redis, so the
+    size of an entry is known exactly and callers never share mutable
+    objects through the cache.
+    """
+
+    def __init__(self, max_bytes, default_ttl):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, size, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        ttl = self.default_ttl if ttl is None else min(ttl, self.default_ttl)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def delete(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def usage(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for `reset_timeout` seconds after
+    `failure_threshold` consecutive failures, then lets a single trial call
+    through to decide whether to close again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class TieredCache:
+    """
+    Read-through L1 (in-process) and L2 (Redis) cache.
+
+    Redis errors never propagate: they count against the circuit breaker,
+    and while it is open Redis is skipped entirely and only L1 is used.
+    """
+
+    def __init__(self, l1, breaker, get_client):
+        self.l1 = l1
+        self.breaker = breaker
+        self._get_client = get_client
+        self._lock = threading.Lock()
+        self._counters = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "redis_errors": 0, "redis_skipped": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def call_redis(self, operation):
+        """
+        Run `operation(client)` against Redis under the circuit breaker.
+
+        Returns:
+            tuple: (result, or None on failure or while the circuit is open; whether Redis was reached)
+        """
+        if not self.breaker.allow():
+            self._count("redis_skipped")
+            return None, False
+        try:
+            result = operation(self._get_client())
+        except Exception:
+            self.breaker.record_failure()
+            self._count("redis_errors")
+            return None, False
+        self.breaker.record_success()
+        return result, True
+
+    @staticmethod
+    def _get_with_ttl(client, key):
+        pipe = client.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.pttl(key)
+        return pipe.execute()
+
+    def get(self, key):
+        value = self.l1.get(key)
+        if value is not None:
+            self._count("l1_hits")
+            return value
+
+        result, _ = self.call_redis(lambda client: self._get_with_ttl(client, key))
+        value, ttl_ms = result if result else (None, None)
+        if value is not None:
+            self._count("l2_hits")
+            # Never keep the L1 copy longer than Redis keeps the original.
+            self.l1.set(key, value, ttl_ms / 1000.0 if ttl_ms and ttl_ms > 0 else None)
+            return value
+
+        self._count("misses")
+        return None
+
+    def set(self, key, value, ttl):
+        self.l1.set(key, value, ttl)
+        self.call_redis(lambda client: client.setex(key, ttl, value))
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["l1_hits"] + counters["l2_hits"] + counters["misses"]
+        l2_lookups = counters["l2_hits"] + counters["misses"]
+        counters["l1_hit_ratio"] = round(counters["l1_hits"] / lookups, 4) if lookups else None
+        counters["l2_hit_ratio"] = round(counters["l2_hits"] / l2_lookups, 4) if l2_lookups else None
+        counters["overall_hit_ratio"] = round((counters["l1_hits"] + counters["l2_hits"]) / lookups, 4) if lookups else None
+        counters["circuit_state"] = self.breaker.state
+        counters["l1"] = self.l1.usage()
+        return counters
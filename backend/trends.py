@@ -0,0 +1,173 @@
+import os
+import time
+import numpy as np
+import analysis
+import reddit_config
+from redis_config import get_redis_client
+
+TREND_TTL = int(os.getenv("TREND_TTL", 7 * 24 * 3600))
+
+INTERVAL_SECONDS = {
+    "hour": 3600,
+    "day": 86400,
+}
+
+FILTER_WINDOWS = {
+    "day": 86400,
+    "week": 7 * 86400,
+    "month": 30 * 86400,
+    "year": 365 * 86400,
+    "all": None,
+}
+
+
+def _trend_keys(keyword, interval):
+    base = f"trend:{reddit_config.normalize_keyword(keyword)}"
+    return f"{base}:{interval}:buckets", f"{base}:{interval}:stats", f"{base}:{interval}:seen"
+
+def bucket_posts(created_utc, probabilities, interval_seconds):
+    """
+    Bin posts into fixed time buckets.
+
+    Args:
+        created_utc (array-like): Post creation timestamps in seconds
+        probabilities (array-like): Positive probability for each post
+        interval_seconds (int): Bucket width
+
+    Returns:
+        tuple: (bucket start timestamps, post counts, positive probability sums)
+    """
+    created_utc = np.asarray(created_utc, dtype=np.int64)
+    probabilities = np.asarray(probabilities, dtype=float)
+    if created_utc.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+    starts = created_utc - created_utc % interval_seconds
+    buckets, inverse = np.unique(starts, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(buckets))
+    positive_sums = np.bincount(inverse, weights=probabilities, minlength=len(buckets))
+    return buckets, counts, positive_sums
+
+def _post_ids(post):
+    return list(dict.fromkeys([post["id"]] + (post.get("duplicate_ids") or [])))
+
+def _unseen_posts(redis_client, seen_key, posts):
+    """Return posts none of whose ids (including collapsed copies) were rolled up before."""
+    candidates = [post for post in posts if post.get("id")]
+    if not candidates:
+        return []
+
+    ids, owners = [], []
+    for index, post in enumerate(candidates):
+        for post_id in _post_ids(post):
+            ids.append(post_id)
+            owners.append(index)
+
+    seen = np.asarray(redis_client.smismember(seen_key, ids), dtype=bool)
+    already_seen = np.bincount(np.asarray(owners)[seen], minlength=len(candidates)) > 0
+    return [post for post, was_seen in zip(candidates, already_seen) if not was_seen]
+
+def _claim_posts(redis_client, seen_key, posts):
+    """
+    Add each post's ids to the seen set in one transaction and return only
+    the posts whose ids this call added, so concurrent merges of the same
+    keyword never count a post twice.
+    """
+    pipe = redis_client.pipeline()
+    for post in posts:
+        pipe.sadd(seen_key, *_post_ids(post))
+    added = pipe.execute()
+    return [post for post, count in zip(posts, added) if count == len(_post_ids(post))]
+
+def merge_posts(keyword, interval, posts):
+    """
+    Classify posts not yet rolled up for this keyword and merge them into
+    the Redis bucket rollups. Buckets that already exist are only incremented.
+
+    Posts are claimed before they are classified. Posts the classifier
+    cannot use (such as bare links) stay claimed and are skipped; on any
+    other classification error the claim is released so a later query can
+    retry them.
+
+    Returns:
+        int: Number of newly merged posts
+    """
+    redis_client = get_redis_client()
+    buckets_key, stats_key, seen_key = _trend_keys(keyword, interval)
+
+    fresh = _unseen_posts(redis_client, seen_key, posts)
+    if fresh:
+        fresh = _claim_posts(redis_client, seen_key, fresh)
+    if not fresh:
+        return 0
+
+    texts = [post.get("text") or post.get("title") or "" for post in fresh]
+    try:
+        prediction = analysis.classify_texts(texts, return_probabilities=True)
+    except analysis.NoValidTextError:
+        prediction = {"probabilities": []}
+    except Exception:
+        redis_client.srem(seen_key, *[post_id for post in fresh for post_id in _post_ids(post)])
+        raise
+
+    created, probabilities = [], []
+    for post, probability in zip(fresh, prediction.get("probabilities", [])):
+        if probability is None or not post.get("created_utc"):
+            continue
+        created.append(post["created_utc"])
+        probabilities.append(probability)
+
+    buckets, counts, positive_sums = bucket_posts(created, probabilities, INTERVAL_SECONDS[interval])
+
+    pipe = redis_client.pipeline()
+    for bucket, count, positive_sum in zip(buckets.tolist(), counts.tolist(), positive_sums.tolist()):
+        pipe.zadd(buckets_key, {str(bucket): bucket})
+        pipe.hincrby(stats_key, f"{bucket}:count", count)
+        pipe.hincrbyfloat(stats_key, f"{bucket}:positive", positive_sum)
+    for key in (buckets_key, stats_key, seen_key):
+        pipe.expire(key, TREND_TTL)
+    pipe.execute()
+    return len(fresh)
+
+def read_buckets(keyword, interval, since=None):
+    redis_client = get_redis_client()
+    buckets_key, stats_key, _ = _trend_keys(keyword, interval)
+
+    buckets = [int(b) for b in redis_client.zrangebyscore(buckets_key, since if since is not None else "-inf", "+inf")]
+    if not buckets:
+        return []
+
+    fields = []
+    for bucket in buckets:
+        fields.extend([f"{bucket}:count", f"{bucket}:positive"])
+    values = np.asarray([float(v or 0) for v in redis_client.hmget(stats_key, fields)]).reshape(-1, 2)
+    counts = values[:, 0]
+    positive = np.divide(values[:, 1], counts, out=np.zeros_like(counts), where=counts > 0)
+
+    return [{
+        "start": bucket,
+        "count": int(count),
+        "positive_percentage": round(float(p) * 100, 2),
+        "negative_percentage": round((1 - float(p)) * 100, 2) if count else 0.0,
+    } for bucket, count, p in zip(buckets, counts, positive)]
+
+def sentiment_trend(keyword, time_filter="week", interval="hour", limit=100):
+    all_posts, _ = analysis.fetch_posts(keyword, limit, time_filter, dedup_enabled=True)
+    posts = [post for subreddit_posts in all_posts.values() for post in subreddit_posts]
+
+    merged = merge_posts(keyword, interval, posts)
+
+    window = FILTER_WINDOWS[time_filter]
+    since = None
+    if window is not None:
+        now = int(time.time())
+        since = now - window - (now - window) % INTERVAL_SECONDS[interval]
+
+    return {
+        "keyword": keyword,
+        "interval": interval,
+        "filter": time_filter,
+        "fetched_posts": len(posts),
+        "new_posts": merged,
+        "buckets": read_buckets(keyword, interval, since),
+    }
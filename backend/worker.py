@@ -0,0 +1,97 @@
+import argparse
+import logging
+import multiprocessing
+import time
+import analysis
+import comments
+import jobs
+
+logger = logging.getLogger("sentiscope.worker")
+
+
+def run_job(job_id):
+    try:
+        _run_job(job_id)
+    finally:
+        jobs.ack_job(job_id)
+
+def _run_job(job_id):
+    job = jobs.get_job(job_id)
+    if job is None:
+        logger.warning(f"Job {job_id} expired before it was picked up")
+        return
+
+    params = job["params"]
+    started = time.perf_counter()
+    try:
+        jobs.update_job(job_id, status=jobs.STATUS_RUNNING, stage="fetch", progress=5)
+        all_posts, dedup_stats = analysis.fetch_posts(
+            params["keyword"], params["limit"], params["filter"], params.get("dedup", True)
+        )
+        posts = [post for subreddit_posts in all_posts.values() for post in subreddit_posts]
+        result = {
+            "keyword": params["keyword"],
+            "total_subreddits": len(all_posts),
+            "subreddits": list(all_posts.keys()),
+            "posts": all_posts,
+        }
+        if dedup_stats is not None:
+            result["dedup"] = dedup_stats
+
+        jobs.update_job(job_id, stage="classify", progress=40)
+        sentiment = analysis.classify_posts(posts)
+        result["sentiment"] = sentiment
+
+        comment_options = params.get("comments")
+        if comment_options:
+            jobs.update_job(job_id, stage="comments", progress=55)
+            result["comment_sentiment"] = comments.comment_sentiment(
+                posts, comment_options["posts"], comment_options["limit"], comment_options["depth"]
+            )
+
+        if params.get("summary", True):
+            jobs.update_job(job_id, stage="summarize", progress=70)
+            prompts = analysis.build_summary_prompt(params["keyword"], sentiment, posts)
+            result["summary"] = analysis.generate_summary(*prompts) if prompts else None
+
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        jobs.update_job(job_id, status=jobs.STATUS_COMPLETED, stage="done", progress=100, result=result)
+    except Exception as e:
+        logger.exception(f"Job {job_id} failed")
+        jobs.update_job(job_id, status=jobs.STATUS_FAILED, error=str(e))
+
+def work_forever(poll_timeout=5):
+    logger.info("Worker started")
+    while True:
+        try:
+            recovered = jobs.requeue_stale_jobs()
+            if recovered:
+                logger.warning(f"Recovered {recovered} jobs from unresponsive workers")
+            job_id = jobs.next_job(timeout=poll_timeout)
+        except Exception as e:
+            logger.warning(f"Failed to read job queue: {str(e)}")
+            time.sleep(poll_timeout)
+            continue
+        if job_id:
+            run_job(job_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Sentiscope analysis workers")
+    parser.add_argument("--processes", type=int, default=1, help="Number of worker processes")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+
+    if args.processes == 1:
+        work_forever()
+        return
+
+    processes = [multiprocessing.Process(target=work_forever, name=f"worker-{i}") for i in range(args.processes)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,7 @@ vectorizer_path = os.path.join(os.path.dirname(__file__), "vectoriser.pkl")
 model_path = os.path.join(os.path.dirname(__file__), "sentiscope.pkl")
 
 app = Flask(__name__)
+app.config['RATELIMIT_ENABLED'] = os.getenv('RATELIMIT_ENABLED', 'true').lower() != 'false'
 CORS(app)
 
 # Initialize rate limiter
@@ -69,6 +70,103 @@ def clean_text(text):
     except Exception:
         return ""
 
+def summarize_sentiment(positive, negative):
+    """
+    Build the sentiment summary returned for a set of predictions.
+
+    Args:
+        positive (float): Mean positive probability in [0, 1]
+        negative (float): Mean negative probability in [0, 1]
+
+    Returns:
+        dict: Sentiment label and rounded percentages
+    """
+    positive_percentage = float(positive) * 100
+    negative_percentage = float(negative) * 100
+    return {
+        'sentiment': "Positive" if positive_percentage > negative_percentage else "Negative",
+        'positive_percentage': round(positive_percentage, 2),
+        'negative_percentage': round(negative_percentage, 2)
+    }
+
+
+def aggregate_predictions(predictions, groups=None, weights=None):
+    """
+    Aggregate class probabilities globally, per group and by weight in one pass.
+
+    Per-group means are computed with np.bincount over the group indices, so
+    every group is reduced at once instead of looping over texts per group.
+
+    Args:
+        predictions (array-like): (n, 2) array of [negative, positive] probabilities
+        groups (list, optional): Group label for each prediction
+        weights (list, optional): Non-negative weight for each prediction
+
+    Returns:
+        dict: Overall summary, plus 'weighted' and 'groups' entries when requested
+    """
+    predictions = np.asarray(predictions, dtype=float)
+    negative = predictions[:, 0]
+    positive = predictions[:, 1]
+
+    result = summarize_sentiment(positive.mean(), negative.mean())
+
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        total_weight = weights.sum()
+        if total_weight > 0:
+            weighted = summarize_sentiment(weights @ positive / total_weight, weights @ negative / total_weight)
+            weighted['total_weight'] = float(total_weight)
+            result['weighted'] = weighted
+        else:
+            result['weighted'] = None
+
+    if groups is not None:
+        labels, inverse = np.unique(np.asarray(groups, dtype=str), return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(labels))
+        positive_means = np.bincount(inverse, weights=positive, minlength=len(labels)) / counts
+        negative_means = np.bincount(inverse, weights=negative, minlength=len(labels)) / counts
+
+        if weights is not None:
+            group_weights = np.bincount(inverse, weights=weights, minlength=len(labels))
+            weighted_positive = np.bincount(inverse, weights=weights * positive, minlength=len(labels))
+            weighted_negative = np.bincount(inverse, weights=weights * negative, minlength=len(labels))
+
+        group_results = {}
+        for i, label in enumerate(labels):
+            group = summarize_sentiment(positive_means[i], negative_means[i])
+            group['count'] = int(counts[i])
+            if weights is not None:
+                if group_weights[i] > 0:
+                    weighted = summarize_sentiment(weighted_positive[i] / group_weights[i],
+                                                   weighted_negative[i] / group_weights[i])
+                    weighted['total_weight'] = float(group_weights[i])
+                    group['weighted'] = weighted
+                else:
+                    group['weighted'] = None
+            group_results[str(label)] = group
+        result['groups'] = group_results
+
+    return result
+
+
+def _validate_aligned(data, field, texts):
+    """Return an error message if `field` is present but not a list aligned with texts."""
+    values = data.get(field)
+    if values is None:
+        return None
+    if not isinstance(values, list) or len(values) != len(texts):
+        return f'{field.capitalize()} must be an array with one entry per text'
+    return None
+
+
+def _parse_flag(value):
+    """Accept a JSON bool or a 'true'/'1'/'yes' string; anything else is false."""
+    if isinstance(value, bool):
+        return value
+    return isinstance(value, str) and value.strip().lower() in ('true', '1', 'yes')
+
+
 @app.route("/predict", methods=["POST"])
 @limiter.limit("30 per minute")
 def predict():
@@ -77,14 +175,20 @@ def predict():
     
     Expected JSON payload:
     {
-        "texts": ["text1", "text2", ...]
+        "texts": ["text1", "text2", ...],
+        "groups": ["subreddit1", "subreddit2", ...],   (optional)
+        "weights": [12, 340, ...],                     (optional, e.g. post score; negatives count as 0)
+        "return_probabilities": true                   (optional)
     }
     
     Returns:
     {
         "sentiment": "Positive" or "Negative",
         "positive_percentage": float,
-        "negative_percentage": float
+        "negative_percentage": float,
+        "weighted": {...},                             (when weights are given)
+        "groups": {"subreddit1": {..., "count": int}}, (when groups are given)
+        "probabilities": [float or null, ...]          (positive probability per input text)
     }
     """
     try:
@@ -99,13 +203,32 @@ def predict():
         if not isinstance(texts, list) or len(texts) == 0:
             return jsonify({'error': 'Texts must be a non-empty array'}), 400
 
-        # Clean and validate texts
+        for field in ('groups', 'weights'):
+            error = _validate_aligned(data, field, texts)
+            if error:
+                return jsonify({'error': error}), 400
+
+        groups = data.get('groups')
+        weights = data.get('weights')
+        if weights is not None:
+            try:
+                weights = np.asarray(weights, dtype=float)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'Weights must be numbers'}), 400
+            if not np.all(np.isfinite(weights)):
+                return jsonify({'error': 'Weights must be finite numbers'}), 400
+            # Reddit scores are often zero or negative; such posts carry no weight.
+            weights = np.clip(weights, 0, None)
+
+        # Clean and validate texts, remembering which inputs survived
         cleaned_texts = []
-        for item in texts:
+        kept_indices = []
+        for index, item in enumerate(texts):
             if isinstance(item, str) and item.strip():
                 cleaned = clean_text(item.strip())
                 if cleaned:
                     cleaned_texts.append(cleaned)
+                    kept_indices.append(index)
         
         if not cleaned_texts:
             return jsonify({'error': 'No valid text found for analysis'}), 400
@@ -113,19 +236,25 @@ def predict():
         # Limit to prevent resource exhaustion
         if len(cleaned_texts) > 1000:
             cleaned_texts = cleaned_texts[:1000]
+            kept_indices = kept_indices[:1000]
 
         vectorized_texts = vectorizer.transform(cleaned_texts)
         predictions = LRmodel.predict_proba(vectorized_texts)
-        
-        positive_percentage = np.mean([prob[1] for prob in predictions]) * 100  
-        negative_percentage = np.mean([prob[0] for prob in predictions]) * 100 
-        sentiment = "Positive" if positive_percentage > negative_percentage else "Negative"
-
-        return jsonify({
-            'sentiment': sentiment,
-            'positive_percentage': round(positive_percentage, 2),
-            'negative_percentage': round(negative_percentage, 2)
-        })
+
+        kept = np.asarray(kept_indices)
+        response = aggregate_predictions(
+            predictions,
+            groups=[groups[i] for i in kept_indices] if groups is not None else None,
+            weights=weights[kept] if weights is not None else None
+        )
+
+        if _parse_flag(data.get('return_probabilities')):
+            probabilities = [None] * len(texts)
+            for index, probability in zip(kept_indices, np.asarray(predictions, dtype=float)[:, 1]):
+                probabilities[index] = round(float(probability), 4)
+            response['probabilities'] = probabilities
+
+        return jsonify(response)
     
     except Exception as e:
         return jsonify({'error': 'An error occurred during prediction'}), 500
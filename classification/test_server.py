@@ -129,3 +129,80 @@ def test_predict_error_handling(client):
         assert response.status_code == 500
         data = json.loads(response.data)
         assert 'An error occurred during prediction' in data['error']
+
+@patch('server.vectorizer.transform')
+@patch('server.LRmodel.predict_proba')
+def test_predict_groups_and_weights(mock_predict, mock_transform, client):
+    """Test per-group and weighted aggregation in a single call."""
+    mock_transform.return_value = MagicMock()
+    mock_predict.return_value = [[0.2, 0.8], [0.6, 0.4], [0.9, 0.1]]
+
+    response = client.post('/predict', json={
+        "texts": ["great stuff", "meh stuff", "awful stuff"],
+        "groups": ["apple", "apple", "stocks"],
+        "weights": [3, 1, 1],
+        "return_probabilities": True
+    })
+    assert response.status_code == 200
+    data = json.loads(response.data)
+
+    assert data['positive_percentage'] == pytest.approx(43.33, abs=0.01)
+    assert data['weighted']['positive_percentage'] == pytest.approx(58.0)
+    assert data['groups']['apple']['count'] == 2
+    assert data['groups']['apple']['positive_percentage'] == pytest.approx(60.0)
+    assert data['groups']['apple']['weighted']['positive_percentage'] == pytest.approx(70.0)
+    assert data['groups']['stocks']['sentiment'] == 'Negative'
+    assert data['probabilities'] == [0.8, 0.4, 0.1]
+
+@patch('server.vectorizer.transform')
+@patch('server.LRmodel.predict_proba')
+def test_predict_groups_skip_invalid_texts(mock_predict, mock_transform, client):
+    """Test that group labels stay aligned when some texts are dropped."""
+    mock_transform.return_value = MagicMock()
+    mock_predict.return_value = [[0.3, 0.7]]
+
+    response = client.post('/predict', json={
+        "texts": ["", "lovely day"],
+        "groups": ["dropped", "kept"],
+        "return_probabilities": True
+    })
+    data = json.loads(response.data)
+    assert list(data['groups'].keys()) == ['kept']
+    assert data['probabilities'] == [None, 0.7]
+
+def test_predict_misaligned_groups(client):
+    """Test that groups and weights must match the texts array."""
+    response = client.post('/predict', json={"texts": ["a", "b"], "groups": ["x"]})
+    assert response.status_code == 400
+    assert 'one entry per text' in json.loads(response.data)['error']
+
+    response = client.post('/predict', json={"texts": ["a", "b"], "weights": [1, "x"]})
+    assert response.status_code == 400
+    assert 'numbers' in json.loads(response.data)['error']
+
+@patch('server.vectorizer.transform')
+@patch('server.LRmodel.predict_proba')
+def test_predict_negative_scores_as_weights(mock_predict, mock_transform, client):
+    """Test that negative post scores are clipped to zero weight instead of rejected."""
+    mock_transform.return_value = MagicMock()
+    mock_predict.return_value = [[0.2, 0.8], [0.9, 0.1], [0.6, 0.4]]
+
+    response = client.post('/predict', json={
+        "texts": ["great stuff", "awful stuff", "meh stuff"],
+        "weights": [4, -25, 0]
+    })
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['weighted']['positive_percentage'] == pytest.approx(80.0)
+    assert data['weighted']['total_weight'] == 4.0
+
+@patch('server.vectorizer.transform')
+@patch('server.LRmodel.predict_proba')
+def test_predict_return_probabilities_string_flags(mock_predict, mock_transform, client):
+    """Test that string flags such as "false" do not enable probabilities."""
+    mock_transform.return_value = MagicMock()
+    mock_predict.return_value = [[0.3, 0.7]]
+
+    for flag, expected in (("false", False), ("0", False), ("true", True), ("yes", True), (True, True)):
+        response = client.post('/predict', json={"texts": ["lovely day"], "return_probabilities": flag})
+        assert ('probabilities' in json.loads(response.data)) is expected
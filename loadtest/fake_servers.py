@@ -0,0 +1,230 @@
+"""
+Local stand-ins for the Reddit and OpenAI APIs used by the backend.
+
+Responses are replayed from the recorded fixtures in ./fixtures with a
+configurable latency and rate of injected 429 responses, so the backend can
+be load tested without touching the real services.
+
+Usage:
+    python fake_servers.py --reddit-port 5101 --openai-port 5102 --latency-ms 80 --error-rate 0.02
+
+Then start the backend with:
+    REDDIT_AUTH_BASE_URL=http://localhost:5101
+    REDDIT_API_BASE_URL=http://localhost:5101
+    OPENAI_BASE_URL=http://localhost:5102/v1
+    OPENAI_API_KEY=fake
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import threading
+import time
+from flask import Flask, request, jsonify
+from werkzeug.serving import make_server
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Like the real API, pages hold at most 100 posts and search stops after a
+# few hundred results.
+MAX_PAGE_SIZE = 100
+MAX_SEARCH_RESULTS = 250
+PAGE_CURSOR_PREFIX = "t3_page"
+
+
+def load_fixture(name):
+    """Load a recorded JSON response from the fixtures directory."""
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as fixture_file:
+        return json.load(fixture_file)
+
+
+class FaultInjector:
+    """
+    Apply simulated latency and rate limiting to fake responses.
+
+    Args:
+        latency_ms (float): Mean added latency per request
+        jitter_ms (float): Maximum random deviation from the mean latency
+        error_rate (float): Probability in [0, 1] of answering with a 429
+        seed (int): Optional seed for reproducible runs
+    """
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.rate_limited = 0
+
+    def apply(self):
+        """Sleep for the simulated latency and return a 429 response if one is injected."""
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms))
+            limited = self._random.random() < self.error_rate
+            if limited:
+                self.rate_limited += 1
+        if delay:
+            time.sleep(delay / 1000.0)
+        if limited:
+            response = jsonify({"message": "Too Many Requests", "error": 429})
+            response.status_code = 429
+            response.headers["Retry-After"] = "1"
+            return response
+        return None
+
+
+def expand_listing(listing, limit, subreddit=None, offset=0, total=None):
+    """
+    Build a listing page of `limit` posts starting at `offset` by cycling
+    through the recorded children.
+
+    Repeated posts get unique ids so they look like distinct results to the
+    backend, the same way real search pages do. When `total` is given the
+    page carries an `after` cursor until that many results have been served.
+    """
+    children = listing["data"]["children"]
+    end = offset + limit if total is None else min(offset + limit, total)
+    result = []
+    for i in range(offset, end):
+        child = copy.deepcopy(children[i % len(children)])
+        data = child["data"]
+        if i >= len(children):
+            data["id"] = f"{data['id']}{i}"
+            data["name"] = f"t3_{data['id']}"
+            data["permalink"] = f"/r/{data['subreddit']}/comments/{data['id']}/"
+        if subreddit:
+            data["subreddit"] = subreddit
+        result.append(child)
+    after = f"{PAGE_CURSOR_PREFIX}{end}" if total is not None and end < total else None
+    return {"kind": "Listing", "data": {"after": after, "dist": len(result), "children": result}}
+
+
+def parse_after():
+    after = request.args.get("after", "")
+    if after.startswith(PAGE_CURSOR_PREFIX):
+        try:
+            return int(after[len(PAGE_CURSOR_PREFIX):])
+        except ValueError:
+            pass
+    return 0
+
+
+def parse_limit(default=25, maximum=1000):
+    try:
+        return max(1, min(int(request.args.get("limit", default)), maximum))
+    except ValueError:
+        return default
+
+
+def create_reddit_app(injector):
+    app = Flask("fake_reddit")
+    search_fixture = load_fixture("reddit_search.json")
+    autocomplete_fixture = load_fixture("reddit_autocomplete.json")
+    comments_fixture = load_fixture("reddit_comments.json")
+
+    @app.route("/api/v1/access_token", methods=["POST"])
+    def access_token():
+        return jsonify({"access_token": "fake-token", "token_type": "bearer", "expires_in": 86400, "scope": "read"})
+
+    @app.route("/search", methods=["GET"])
+    def search():
+        limited = injector.apply()
+        if limited is not None:
+            return limited
+        limit = parse_limit(maximum=MAX_PAGE_SIZE)
+        return jsonify(expand_listing(search_fixture, limit, offset=parse_after(), total=MAX_SEARCH_RESULTS))
+
+    @app.route("/r/<subreddit>/hot", methods=["GET"])
+    def hot(subreddit):
+        limited = injector.apply()
+        if limited is not None:
+            return limited
+        limit = parse_limit(maximum=MAX_PAGE_SIZE)
+        return jsonify(expand_listing(search_fixture, limit, subreddit, offset=parse_after(), total=MAX_SEARCH_RESULTS))
+
+    @app.route("/comments/<post_id>", methods=["GET"])
+    def comments(post_id):
+        limited = injector.apply()
+        if limited is not None:
+            return limited
+        listing = copy.deepcopy(comments_fixture)
+        listing[0]["data"]["children"][0]["data"]["id"] = post_id
+        listing[1]["data"]["children"] = listing[1]["data"]["children"][:parse_limit(default=200, maximum=500)]
+        return jsonify(listing)
+
+    @app.route("/api/subreddit_autocomplete_v2", methods=["GET"])
+    def subreddit_autocomplete():
+        limited = injector.apply()
+        if limited is not None:
+            return limited
+        listing = copy.deepcopy(autocomplete_fixture)
+        listing["data"]["children"] = listing["data"]["children"][:parse_limit(default=10, maximum=10)]
+        return jsonify(listing)
+
+    @app.route("/_stats", methods=["GET"])
+    def stats():
+        return jsonify({"requests": injector.requests, "rate_limited": injector.rate_limited})
+
+    return app
+
+
+def create_openai_app(injector):
+    app = Flask("fake_openai")
+    completion_fixture = load_fixture("openai_chat_completion.json")
+
+    @app.route("/v1/chat/completions", methods=["POST"])
+    def chat_completions():
+        limited = injector.apply()
+        if limited is not None:
+            return limited
+        body = request.get_json(silent=True) or {}
+        completion = copy.deepcopy(completion_fixture)
+        completion["created"] = int(time.time())
+        completion["model"] = body.get("model", completion["model"])
+        return jsonify(completion)
+
+    @app.route("/_stats", methods=["GET"])
+    def stats():
+        return jsonify({"requests": injector.requests, "rate_limited": injector.rate_limited})
+
+    return app
+
+
+def serve(app, port):
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run fake Reddit and OpenAI servers for load testing")
+    parser.add_argument("--reddit-port", type=int, default=5101)
+    parser.add_argument("--openai-port", type=int, default=5102)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--openai-latency-ms", type=float, default=None, help="Defaults to --latency-ms")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    openai_latency = args.latency_ms if args.openai_latency_ms is None else args.openai_latency_ms
+    servers = [
+        serve(create_reddit_app(FaultInjector(args.latency_ms, args.jitter_ms, args.error_rate, args.seed)), args.reddit_port),
+        serve(create_openai_app(FaultInjector(openai_latency, args.jitter_ms, args.error_rate, args.seed)), args.openai_port),
+    ]
+    print(f"Fake Reddit on http://localhost:{args.reddit_port}, fake OpenAI on http://localhost:{args.openai_port}/v1")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Open-loop load generator for the Sentiscope backend and classification service.
+
+Requests to /fetch, /predict and /generateSummary are scheduled at a fixed
+target rate regardless of how quickly earlier requests complete, so slow
+responses show up as latency instead of silently lowering the offered load.
+Cache hit ratios come from Redis keyspace counters and, for the backend's
+search cache tiers, from its /cache/stats endpoint. Note that with a single
+backend process most repeat lookups are served from L1.
+
+Usage:
+    python load_generator.py --rps 20 --duration 60 --mix fetch=6,predict=3,summary=1
+
+Run the backend and classifier with RATELIMIT_ENABLED=false, otherwise the
+per-IP limits will turn most of the run into 429s.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+DEFAULT_KEYWORDS = ["apple", "tesla", "bitcoin", "nvidia", "python", "climate", "election", "iphone"]
+FILTERS = ["all", "day", "week", "month", "year"]
+
+
+def percentile(sorted_values, pct):
+    """Return the nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100.0 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+class Recorder:
+    """Thread-safe collection of per-endpoint latencies and outcomes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(lambda: defaultdict(int))
+
+    def record(self, endpoint, latency, status=None, error=None):
+        with self._lock:
+            self.latencies[endpoint].append(latency)
+            if status is not None:
+                self.statuses[endpoint][status] += 1
+            if error is not None:
+                self.errors[endpoint][error] += 1
+
+    def summary(self, elapsed):
+        report = {}
+        with self._lock:
+            for endpoint, values in self.latencies.items():
+                ordered = sorted(values)
+                statuses = dict(self.statuses[endpoint])
+                ok = sum(count for status, count in statuses.items() if 200 <= status < 300)
+                report[endpoint] = {
+                    "requests": len(ordered),
+                    "ok": ok,
+                    "throughput_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+                    "p50_ms": round(percentile(ordered, 50) * 1000, 1),
+                    "p95_ms": round(percentile(ordered, 95) * 1000, 1),
+                    "p99_ms": round(percentile(ordered, 99) * 1000, 1),
+                    "max_ms": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+                    "statuses": {str(status): count for status, count in sorted(statuses.items())},
+                    "errors": dict(self.errors[endpoint]),
+                }
+        return report
+
+
+def redis_stats(redis_url):
+    """Return Redis keyspace hit/miss counters, or None if Redis is unavailable."""
+    if not redis_url:
+        return None
+    try:
+        import redis
+        info = redis.Redis.from_url(redis_url).info("stats")
+        return {"hits": info.get("keyspace_hits", 0), "misses": info.get("keyspace_misses", 0)}
+    except Exception:
+        return None
+
+
+def backend_cache_stats(session, backend):
+    """Return the backend's L1/L2 search cache counters, or None if unavailable."""
+    try:
+        response = session.get(f"{backend}/cache/stats", timeout=5)
+        return response.json() if response.status_code == 200 else None
+    except (requests.RequestException, ValueError):
+        return None
+
+
+def load_sample_posts():
+    with open(os.path.join(FIXTURES_DIR, "reddit_search.json"), encoding="utf-8") as fixture_file:
+        children = json.load(fixture_file)["data"]["children"]
+    return [{
+        "title": child["data"]["title"],
+        "text": child["data"]["selftext"],
+        "score": child["data"]["score"],
+        "subreddit": child["data"]["subreddit"],
+    } for child in children]
+
+
+class LoadGenerator:
+    def __init__(self, args):
+        self.args = args
+        self.recorder = Recorder()
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=args.concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.random = random.Random(args.seed)
+        self.posts = load_sample_posts()
+        self.mix = self._parse_mix(args.mix)
+
+    @staticmethod
+    def _parse_mix(mix):
+        weights = {}
+        for part in mix.split(","):
+            name, _, weight = part.partition("=")
+            if name.strip() not in ("fetch", "predict", "summary"):
+                raise ValueError(f"Unknown endpoint in mix: {name}")
+            weights[name.strip()] = float(weight or 1)
+        return weights
+
+    def _pick_endpoint(self):
+        names = list(self.mix.keys())
+        return self.random.choices(names, weights=[self.mix[name] for name in names])[0]
+
+    def _build_request(self, endpoint):
+        keyword = self.random.choice(self.args.keywords)
+        if endpoint == "fetch":
+            params = {"keyword": keyword, "limit": self.args.limit, "filter": self.random.choice(FILTERS)}
+            return "GET", f"{self.args.backend}/fetch", {"params": params}
+        if endpoint == "predict":
+            texts = [f"{p['title']}. {p['text']}" for p in self.random.sample(self.posts, k=min(len(self.posts), 8))]
+            return "POST", f"{self.args.classifier}/predict", {"json": {"texts": texts}}
+        body = {
+            "keyword": keyword,
+            "sentiment": {"sentiment": "Positive", "positive_percentage": 62.5, "negative_percentage": 37.5},
+            "posts": self.posts[:6],
+        }
+        return "POST", f"{self.args.backend}/generateSummary", {"json": body}
+
+    def _send(self, endpoint, method, url, kwargs, scheduled):
+        # Latency is measured from the scheduled send time, not from when a
+        # pool thread picks the request up, so time spent queued behind busy
+        # threads is not hidden (coordinated omission).
+        try:
+            response = self.session.request(method, url, timeout=self.args.timeout, **kwargs)
+            self.recorder.record(endpoint, time.perf_counter() - scheduled, status=response.status_code)
+        except requests.RequestException as e:
+            self.recorder.record(endpoint, time.perf_counter() - scheduled, error=type(e).__name__)
+
+    def run(self):
+        interval = 1.0 / self.args.rps
+        total = int(self.args.rps * self.args.duration)
+        before = redis_stats(self.args.redis_url)
+        cache_before = backend_cache_stats(self.session, self.args.backend)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.concurrency) as executor:
+            for i in range(total):
+                scheduled = start + i * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                endpoint = self._pick_endpoint()
+                method, url, kwargs = self._build_request(endpoint)
+                executor.submit(self._send, endpoint, method, url, kwargs, scheduled)
+        elapsed = time.perf_counter() - start
+        after = redis_stats(self.args.redis_url)
+        cache_after = backend_cache_stats(self.session, self.args.backend)
+
+        report = {
+            "target_rps": self.args.rps,
+            "elapsed_s": round(elapsed, 2),
+            "endpoints": self.recorder.summary(elapsed),
+        }
+        if before and after:
+            hits = after["hits"] - before["hits"]
+            misses = after["misses"] - before["misses"]
+            report["redis_cache"] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else None,
+            }
+        if cache_before and cache_after:
+            deltas = {name: cache_after[name] - cache_before[name]
+                      for name in ("l1_hits", "l2_hits", "misses", "redis_errors", "redis_skipped")}
+            lookups = deltas["l1_hits"] + deltas["l2_hits"] + deltas["misses"]
+            l2_lookups = deltas["l2_hits"] + deltas["misses"]
+            deltas["l1_hit_ratio"] = round(deltas["l1_hits"] / lookups, 3) if lookups else None
+            deltas["l2_hit_ratio"] = round(deltas["l2_hits"] / l2_lookups, 3) if l2_lookups else None
+            deltas["circuit_state"] = cache_after["circuit_state"]
+            report["search_cache"] = deltas
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive Sentiscope endpoints at a target request rate")
+    parser.add_argument("--backend", default="http://localhost:5000")
+    parser.add_argument("--classifier", default="http://localhost:5001")
+    parser.add_argument("--rps", type=float, default=10.0)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to generate load for")
+    parser.add_argument("--concurrency", type=int, default=64, help="Maximum in-flight requests")
+    parser.add_argument("--mix", default="fetch=6,predict=3,summary=1", help="Relative endpoint weights")
+    parser.add_argument("--keywords", type=lambda value: value.split(","), default=DEFAULT_KEYWORDS)
+    parser.add_argument("--limit", type=int, default=100, help="limit parameter for /fetch")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                        help="Redis to read cache hit counters from; empty to skip")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Also write the JSON report to this file")
+    args = parser.parse_args()
+    args.backend = args.backend.rstrip("/")
+    args.classifier = args.classifier.rstrip("/")
+
+    report = LoadGenerator(args).run()
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(text)
+
+
+if __name__ == "__main__":
+    main()